@@ -22,6 +22,23 @@ def create_app(node: Node):
     d = Decoder()
     f = Formatter()
 
+    # --- BINARY FORMAT --- #
+    # Raw blocks and txs are sent in the binary format when the request accepts it, and received in it when it is the
+    # request content type. Json with the raw string is kept for peers without the binary format.
+    def accepts_binary() -> bool:
+        return request.accept_mimetypes.best_match([mimetype, f.BINARY_MIMETYPE]) == f.BINARY_MIMETYPE
+
+    def binary_response(raw_bytes: bytes):
+        return Response(raw_bytes, status=200, mimetype=f.BINARY_MIMETYPE)
+
+    def posted_raw(raw_key: str) -> str:
+        '''
+        Returns the raw string posted in the binary format or in a json dict. Raises a ValueError or KeyError.
+        '''
+        if request.mimetype == f.BINARY_MIMETYPE:
+            return f.from_binary(request.get_data())
+        return request.get_json()[raw_key]
+
     @app.route('/')
     def home():
         return render_template('index.html', user_ip=node.ip, user_port=node.assigned_port)
@@ -49,7 +66,7 @@ def create_app(node: Node):
 
     @app.route('/height/')
     def height():
-        height_dict = {'height': node.height}
+        height_dict = {'height': node.height, 'chain_work': node.chain_work}
         return jsonify(height_dict)
 
     @app.route('/target/')
@@ -65,6 +82,24 @@ def create_app(node: Node):
         }
         return jsonify(target_dict)
 
+    @app.route('/mining/')
+    def mining():
+        return jsonify(node.mining_stats)
+
+    @app.route('/caches/')
+    def caches():
+        return jsonify(node.cache_stats)
+
+    @app.route('/chain_state/')
+    def chain_state():
+        with node.block_lock:
+            chain_state_dict = node.blockchain.chain_state
+            chain_state_dict.update({
+                'hex_target': format(node.target, f'0{f.HASH_CHARS}x'),
+                'consistent_with_db': node.blockchain.check_chain_state()
+            })
+        return jsonify(chain_state_dict)
+
     @app.route('/forks/')
     def forks():
         fork_num = len(node.blockchain.forks)
@@ -95,13 +130,11 @@ def create_app(node: Node):
             return Response(f'No block at height {height}', status=404, mimetype=mimetype)
 
         # Return block dict
-        raw_block_dict = node.blockchain.chain_db.get_raw_block(height)
-        if raw_block_dict:
-            raw_block = raw_block_dict['raw_block']
-            temp_block = d.raw_block(raw_block)
+        temp_block = node.blockchain.get_block_by_height(height)
+        if temp_block:
             block_dict = json.loads(temp_block.to_json)
             block_dict.update({
-                'raw_block': raw_block
+                'raw_block': temp_block.raw_block
             })
             return jsonify(block_dict)
         else:
@@ -228,17 +261,20 @@ def create_app(node: Node):
     def handle_raw_block():
         # GET LAST RAW BLOCK
         if request.method == 'GET':
+            if accepts_binary():
+                return binary_response(f.to_binary(node.last_block.raw_block))
             raw_block_dict = {'raw_block': node.last_block.raw_block}
             return jsonify(raw_block_dict)
 
         # POST RAW BLOCK
         elif request.method == 'POST':
-            # dict format = {'raw_block': <raw_block>}
+            # dict format = {'raw_block': <raw_block>} or binary raw block
             try:
-                raw_block_dict = request.get_json()
-                raw_block = raw_block_dict['raw_block']
+                raw_block = posted_raw('raw_block')
             except requests.exceptions.JSONDecodeError:
                 return Response('JSON Decode error', status=400, mimetype=mimetype)
+            except ValueError:
+                return Response('Binary decode error', status=400, mimetype=mimetype)
             except KeyError:
                 return Response('Raw block dict error', status=400, mimetype=mimetype)
 
@@ -249,25 +285,24 @@ def create_app(node: Node):
                 if test_block.id == node.last_block.id:
                     return Response('Received block at top of chain', status=202, mimetype=mimetype)
 
-                # Handle forks before trying to add
+                # Handle forks before trying to add - a fork block with more work reorganises the chain
                 if max(1, node.height - Formatter.HEARTBEAT) <= test_block.height <= node.height:
-                    node.blockchain.create_fork(test_block)
+                    if node.add_block(test_block):
+                        node.refresh_miner()
+                        node.gossip_protocol_block(test_block)
+                        return Response(f'Fork block moved {node.node} to heavier chain', status=200,
+                                        mimetype=mimetype)
                     return Response(f'Raw block added to forks in {node.node}', status=202, mimetype=mimetype)
 
-                # Stop mining
-                resume_mining = node.is_mining
-                node.stop_miner()
-
                 # Add block
                 added = node.add_block(test_block)
                 if added:
+                    # Refresh mining template on new parent
+                    node.refresh_miner()
+
                     # Gossip block
                     node.gossip_protocol_block(test_block)
 
-                # Resume mining
-                if resume_mining:
-                    node.start_miner()
-
                 if not added:
                     return Response(f'Failed to add or fork block', status=400, mimetype=mimetype)
                 # Return success
@@ -287,7 +322,9 @@ def create_app(node: Node):
         if height > node.height or height < 0:
             return Response(f'No block at height {height}', status=404, mimetype=mimetype)
 
-        # Return block dict
+        # Return binary block or block dict
+        if accepts_binary():
+            return binary_response(node.blockchain.chain_db.get_raw_block_binary(height))
         raw_block_dict = node.blockchain.chain_db.get_raw_block(height)
         return jsonify(raw_block_dict)
 
@@ -295,12 +332,13 @@ def create_app(node: Node):
     def handle_raw_tx():
         # POST RAW TX
         if request.method == 'POST':
-            # dict format = {'raw_tx': <raw_tx>}
+            # dict format = {'raw_tx': <raw_tx>} or binary raw tx
             try:
-                raw_tx_dict = request.get_json()
-                raw_tx = raw_tx_dict['raw_tx']
+                raw_tx = posted_raw('raw_tx')
             except requests.exceptions.JSONDecodeError:
                 return Response('JSON Decode error', status=400, mimetype=mimetype)
+            except ValueError:
+                return Response('Binary decode error', status=400, mimetype=mimetype)
             except KeyError:
                 return Response('Raw tx dict error', status=400, mimetype=mimetype)
 
@@ -309,6 +347,8 @@ def create_app(node: Node):
             if new_tx:
                 added = node.add_transaction(new_tx)
                 if added:
+                    # Refresh mining template with new tx
+                    node.refresh_miner()
                     return Response(f'{node.node} received raw_tx with id {new_tx.id} successfully.', status=200,
                                     mimetype=mimetype)
                 else:
@@ -0,0 +1,103 @@
+'''
+Base58 benchmark
+
+Times encoding and decoding addresses with the table-driven Formatter against the previous base58 functions, which
+looked up each symbol with BASE58_LIST.index and computed a power of 58 for every position, and prepended each symbol
+to the string when encoding. The bulk list methods are timed on a list drawn from a smaller set of distinct addresses,
+as the outputs in a block mostly pay the same few addresses.
+
+    python benchmarks/base58_benchmark.py --count 10000 --distinct 100 --repeat 5
+'''
+import argparse
+import os
+import secrets
+import sys
+import time
+from hashlib import sha256
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from formatter import Formatter
+
+# --- CONSTANTS --- #
+f = Formatter()
+
+
+def legacy_int_to_base58(num: int) -> str:
+    '''
+    The previous encoder - each symbol is prepended to the string
+    '''
+    base58_string = ''
+    if num < 0:
+        return base58_string
+    if num == 0:
+        base58_string = '1'
+    else:
+        while num > 0:
+            remainder = num % 58
+            base58_string = f.BASE58_LIST[remainder] + base58_string
+            num = num // 58
+    return base58_string
+
+
+def legacy_base58_to_int(base58_string: str) -> int:
+    '''
+    The previous decoder - each symbol is found in the alphabet list and multiplied by its own power of 58
+    '''
+    return sum([f.BASE58_LIST.index(base58_string[x:x + 1]) * pow(58, len(base58_string) - x - 1) for x in
+                range(0, len(base58_string))])
+
+
+def random_hex_address() -> str:
+    epk = secrets.token_hex(f.EPK_CHARS // 2)
+    checksum = sha256(sha256(epk.encode()).hexdigest().encode()).hexdigest()[:f.CHECKSUM_CHARS]
+    return format(f.ADDRESS_TYPE, f'0{f.TYPE_CHARS}x') + epk + checksum
+
+
+def best_time(function, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(count: int, distinct: int, repeat: int):
+    # Address lists
+    distinct_hex = [random_hex_address() for _ in range(distinct)]
+    hex_addresses = [secrets.choice(distinct_hex) for _ in range(count)]
+    addresses = [legacy_int_to_base58(int(hex_address, 16)) for hex_address in hex_addresses]
+    nums = [int(hex_address, 16) for hex_address in hex_addresses]
+
+    # Agree with the previous functions
+    assert [f.int_to_base58(num) for num in nums] == addresses
+    assert [f.base58_to_int(address) for address in addresses] == nums
+    assert f.hex_addresses(addresses) == hex_addresses
+    assert f.base58_addresses(hex_addresses) == addresses
+
+    timings = [
+        ('encode', lambda: [legacy_int_to_base58(num) for num in nums], lambda: [f.int_to_base58(num) for num in nums]),
+        ('decode', lambda: [legacy_base58_to_int(address) for address in addresses],
+         lambda: [f.base58_to_int(address) for address in addresses]),
+        ('encode list', lambda: [legacy_int_to_base58(int(h, 16)) for h in hex_addresses],
+         lambda: f.base58_addresses(hex_addresses)),
+        ('decode list', lambda: [format(legacy_base58_to_int(a), f'0{f.ADDRESS_CHARS}x') for a in addresses],
+         lambda: f.hex_addresses(addresses))
+    ]
+
+    print(f'{count} addresses, {distinct} distinct')
+    print(f'{"":>12} {"legacy us":>10} {"base58 us":>10} {"speedup":>8}')
+    for (name, legacy_function, function) in timings:
+        legacy_time = best_time(legacy_function, repeat) * 1e6 / count
+        new_time = best_time(function, repeat) * 1e6 / count
+        print(f'{name:>12} {legacy_time:>10.2f} {new_time:>10.2f} {legacy_time / new_time:>7.1f}x')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count', type=int, default=10000, help='Addresses in each list')
+    parser.add_argument('--distinct', type=int, default=100, help='Distinct addresses in each list')
+    parser.add_argument('--repeat', type=int, default=5, help='Best of this many runs')
+    args = parser.parse_args()
+    main(args.count, args.distinct, args.repeat)
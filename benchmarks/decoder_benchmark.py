@@ -0,0 +1,107 @@
+'''
+Decoder benchmark
+
+Times decoding raw blocks of increasing size with the offset-based Decoder against the previous decoder, which sliced
+the remainder of the raw string for every transaction and re-serialised each transaction to find its length. The time
+per transaction should stay flat for the Decoder as the block grows.
+
+    python benchmarks/decoder_benchmark.py --inputs 16 --repeat 5
+'''
+import argparse
+import os
+import secrets
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from block import Block
+from decoder import Decoder
+from formatter import Formatter
+from transactions import MiningTransaction, Transaction
+from utxo import UTXO_INPUT, UTXO_OUTPUT
+
+# --- CONSTANTS --- #
+f = Formatter()
+d = Decoder()
+
+
+def legacy_raw_block_transactions(raw_txs: str):
+    '''
+    The previous decoding loop - each transaction is decoded from a copy of the rest of the raw string
+    '''
+    mining_tx = d.raw_mining_transaction(raw_txs[d.v_index:])
+    mining_index = d.v_index + len(mining_tx.raw_tx)
+    count_index = f.BLOCK_TX_CHARS + mining_index
+    tx_count = int(raw_txs[mining_index: count_index], 16)
+
+    transactions = []
+    temp_index = count_index
+    for x in range(0, tx_count):
+        raw_tx = raw_txs[temp_index:]
+        temp_index_tx = d.v_index + f.COUNT_CHARS
+        inputs = []
+        for _ in range(int(raw_tx[d.v_index:temp_index_tx], 16)):
+            utxo_input = d.raw_utxo_input(raw_tx[temp_index_tx:])
+            inputs.append(utxo_input)
+            temp_index_tx += len(UTXO_INPUT(utxo_input.tx_id, utxo_input.index, utxo_input.signature).raw_utxo)
+        output_count = int(raw_tx[temp_index_tx:temp_index_tx + f.COUNT_CHARS], 16)
+        temp_index_tx += f.COUNT_CHARS
+        outputs = []
+        for _ in range(output_count):
+            utxo_output = d.raw_utxo_output(raw_tx[temp_index_tx:])
+            outputs.append(utxo_output)
+            temp_index_tx += len(utxo_output.raw_utxo)
+        new_tx = Transaction(inputs, outputs)
+        transactions.append(new_tx)
+        temp_index += len(Transaction(inputs, outputs).raw_tx)
+    return mining_tx, transactions
+
+
+def benchmark_block(tx_count: int, input_count: int) -> Block:
+    signature = f.signature(secrets.randbits(256), secrets.token_hex(32))
+    address = f.address(f.cpk(f.CURVE.scalar_multiplication(secrets.randbits(256), f.CURVE.generator)))
+    transactions = [
+        Transaction([UTXO_INPUT(secrets.token_hex(32), x, signature) for x in range(input_count)],
+                    [UTXO_OUTPUT(secrets.randbits(32), address, 0) for _ in range(2)])
+        for _ in range(tx_count)
+    ]
+    mining_tx = MiningTransaction(1, 1, 0, address, 1)
+    return Block(secrets.token_hex(32), f.target_from_parts(f.STARTING_TARGET_COEFFICIENT, 0x20), 0, 0, mining_tx,
+                 transactions)
+
+
+def best_time(function, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(input_count: int, repeat: int):
+    # Transactions in a block of MAXIMUM_BIT_SIZE
+    tx_bits = len(benchmark_block(1, input_count).transactions[0].raw_tx) * 4
+    max_size_count = max(1, f.MAXIMUM_BIT_SIZE // tx_bits + 1)
+
+    print(f'{"txs":>6} {"raw chars":>10} {"decoder ms":>12} {"us/tx":>8} {"legacy ms":>12} {"us/tx":>8}')
+    for tx_count in sorted({max_size_count, 32, 64, 128, pow(16, f.BLOCK_TX_CHARS) - 1}):
+        block = benchmark_block(tx_count, input_count)
+        raw_block = block.raw_block
+        raw_txs = block.raw_transactions
+
+        decoder_time = best_time(lambda: d.raw_block(raw_block), repeat)
+        legacy_time = best_time(lambda: legacy_raw_block_transactions(raw_txs), repeat)
+        assert d.raw_block(raw_block).raw_block == raw_block
+
+        print(f'{tx_count:>6} {len(raw_block):>10} {decoder_time * 1000:>12.2f} {decoder_time * 1e6 / tx_count:>8.1f} '
+              f'{legacy_time * 1000:>12.2f} {legacy_time * 1e6 / tx_count:>8.1f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--inputs', type=int, default=16, help='Inputs in each transaction')
+    parser.add_argument('--repeat', type=int, default=5, help='Best of this many runs')
+    args = parser.parse_args()
+    main(args.inputs, args.repeat)
@@ -5,11 +5,12 @@ import json
 from hashlib import sha256
 
 from formatter import Formatter
+from frozen import Frozen
 from headers import Header
 from transactions import MiningTransaction
 
 
-class Block():
+class Block(Frozen):
     '''
     A Block can be instantiated with the following values:
         -previous block id
@@ -19,24 +20,37 @@ class Block():
         -mining_tx
         -list of transactions
 
-    The Merkle Root for the transaction list will be calculated automatically
+    The Merkle Root for the transaction list will be calculated automatically.
+    The Block is immutable, with the transactions saved as a tuple. Only the nonce and timestamp in the header can be
+    set while mining. The tx ids and raw transactions are computed once, and the raw block is recomputed only when the
+    raw header changes.
     '''
+    __slots__ = ('mining_tx', 'transactions', 'header', '_tx_ids', '_raw_transactions', '_raw_block')
+
+    # Setup formatter
+    f = Formatter()
 
     def __init__(self, prev_id: str, target: int, nonce: int, timestamp: int, mining_tx: MiningTransaction,
                  transactions: list):
         # Block Transactions
-        self.mining_tx = mining_tx
-        self.transactions = transactions
+        self.set_slot('mining_tx', mining_tx)
+        self.set_slot('transactions', tuple(transactions))
 
-        # Calculate merkle root
-        self.merkle_root = calc_merkle_root(self.tx_ids)
+        # Memoized values
+        self.set_slot('_tx_ids', None)
+        self.set_slot('_raw_transactions', None)
+        self.set_slot('_raw_block', None)
 
-        # Headers
-        self.header = Header(prev_id, self.merkle_root, target, nonce, timestamp)
+        # Headers - merkle root calculated from tx ids
+        self.set_slot('header', Header(prev_id, calc_merkle_root(self.tx_ids), target, nonce, timestamp))
 
     def __repr__(self):
         return self.to_json
 
+    @property
+    def merkle_root(self):
+        return self.header.merkle_root
+
     @property
     def prev_id(self):
         return self.header.prev_id
@@ -59,39 +73,38 @@ class Block():
 
     @property
     def raw_transactions(self):
-        # Setup formatter
-        f = Formatter()
+        return self.memo('_raw_transactions', self.format_raw_transactions)
 
+    def format_raw_transactions(self):
         # Type/version
-        type = format(f.BLOCK_TX_TYPE, f'0{f.TYPE_CHARS}x')
-        version = f.VERSION
+        type = format(self.f.BLOCK_TX_TYPE, f'0{self.f.TYPE_CHARS}x')
+        version = self.f.VERSION
 
         # Format tx_count
-        tx_count = format(len(self.transactions), f'0{f.BLOCK_TX_CHARS}x')
+        tx_count = format(len(self.transactions), f'0{self.f.BLOCK_TX_CHARS}x')
 
         # Format UserTxs
-        transaction_string = ''
-        for t in self.transactions:
-            transaction_string += t.raw_tx
+        transaction_string = ''.join([t.raw_tx for t in self.transactions])
 
         # Raw = raw_mining_tx + tx_count +  transaction_string
         return type + version + self.mining_tx.raw_tx + tx_count + transaction_string
 
     @property
     def raw_block(self):
-        # Setup formatter
-        f = Formatter()
+        # Raw block saved with the raw header it was formatted from
+        raw_header = self.raw_header
+        if self._raw_block is None or self._raw_block[0] is not raw_header:
+            # Type/version
+            type = format(self.f.BLOCK_TYPE, f'0{self.f.TYPE_CHARS}x')
+            version = self.f.VERSION
 
-        # Type/version
-        type = format(f.BLOCK_TYPE, f'0{f.TYPE_CHARS}x')
-        version = f.VERSION
-
-        # Raw = type + version + raw_headers + raw_transactions
-        return type + version + self.raw_header + self.raw_transactions
+            # Raw = type + version + raw_headers + raw_transactions
+            self.set_slot('_raw_block', (raw_header, type + version + raw_header + self.raw_transactions))
+        return self._raw_block[1]
 
     @property
     def id(self):
-        return sha256(self.raw_header.encode()).hexdigest()
+        return self.header.id
 
     @property
     def to_json(self):
@@ -115,12 +128,21 @@ class Block():
 
     @property
     def tx_ids(self):
-        return [self.mining_tx.id] + [tx.id for tx in self.transactions]
+        # New list each time - the merkle functions extend the list they are given
+        return list(self.memo('_tx_ids', lambda: tuple([self.mining_tx.id] + [tx.id for tx in self.transactions])))
 
     @property
     def height(self):
         return self.mining_tx.height
 
+    def transaction(self, position: int):
+        '''
+        Returns the tx at the given position in the tx ids. The mining tx is at position 0.
+        '''
+        if position == 0:
+            return self.mining_tx
+        return self.transactions[position - 1]
+
 
 # --- Merkle Root Calculations ---#
 
@@ -0,0 +1,163 @@
+'''
+The BlockView class
+'''
+import json
+from hashlib import sha256
+
+from decoder import Decoder
+from formatter import Formatter
+from frozen import Frozen
+
+
+class BlockView(Frozen):
+    '''
+    A read-only view of a saved raw block. The BlockView has the same properties as the Block, but only decodes what
+    is accessed: the header values, height, id and tx ids are read from the raw block without creating any utxos, and
+    the transactions are decoded the first time they are used.
+    Only raw blocks which have been validated and saved should be viewed, as the merkle root isn't recalculated.
+    '''
+    __slots__ = ('raw_block', '_header', '_id', '_tx_spans', '_tx_ids', '_mining_tx', '_transactions')
+
+    # Formatter and decoder
+    f = Formatter()
+    d = Decoder()
+
+    # Indexing
+    V_INDEX = f.TYPE_CHARS + f.VERSION_CHARS
+    HEADER_INDEX = V_INDEX
+    TX_INDEX = HEADER_INDEX + f.HEADER_CHARS
+    MINING_TX_INDEX = TX_INDEX + V_INDEX
+    INPUT_CHARS = V_INDEX + f.TX_ID_CHARS + f.INDEX_CHARS + f.SIGNATURE_CHARS
+    OUTPUT_CHARS = V_INDEX + f.AMOUNT_CHARS + f.ADDRESS_CHARS + f.HEIGHT_CHARS
+    MINING_TX_CHARS = V_INDEX + f.HEIGHT_CHARS + f.REWARD_CHARS + f.AMOUNT_CHARS + OUTPUT_CHARS
+
+    def __init__(self, raw_block: str):
+        self.set_slot('raw_block', raw_block)
+
+        # Memoized values
+        self.set_slot('_header', None)
+        self.set_slot('_id', None)
+        self.set_slot('_tx_spans', None)
+        self.set_slot('_tx_ids', None)
+        self.set_slot('_mining_tx', None)
+        self.set_slot('_transactions', None)
+
+    def __repr__(self):
+        return self.to_json
+
+    # --- HEADER --- #
+    @property
+    def raw_header(self):
+        return self.raw_block[self.HEADER_INDEX:self.TX_INDEX]
+
+    @property
+    def header(self):
+        return self.memo('_header', lambda: self.d.read_block_header(self.raw_block, self.HEADER_INDEX)[0])
+
+    @property
+    def prev_id(self):
+        return self.header.prev_id
+
+    @property
+    def merkle_root(self):
+        return self.header.merkle_root
+
+    @property
+    def target(self):
+        return self.header.target
+
+    @property
+    def nonce(self):
+        return self.header.nonce
+
+    @property
+    def timestamp(self):
+        return self.header.timestamp
+
+    @property
+    def id(self):
+        return self.memo('_id', lambda: sha256(self.raw_header.encode()).hexdigest())
+
+    @property
+    def height(self):
+        height_index = self.MINING_TX_INDEX + self.V_INDEX
+        return int(self.raw_block[height_index:height_index + self.f.HEIGHT_CHARS], 16)
+
+    # --- TRANSACTIONS --- #
+    @property
+    def tx_spans(self):
+        '''
+        The (start, end) indices of the mining tx and each transaction in the raw block. Transactions are skipped over
+        using their input and output counts.
+        '''
+        return self.memo('_tx_spans', self.find_tx_spans)
+
+    def find_tx_spans(self):
+        raw = self.raw_block
+        count_chars = self.f.COUNT_CHARS
+
+        # Mining tx
+        mining_end = self.MINING_TX_INDEX + self.MINING_TX_CHARS
+        spans = [(self.MINING_TX_INDEX, mining_end)]
+
+        # Transactions
+        tx_count = int(raw[mining_end:mining_end + self.f.BLOCK_TX_CHARS], 16)
+        start = mining_end + self.f.BLOCK_TX_CHARS
+        for _ in range(tx_count):
+            output_index = start + self.V_INDEX + count_chars
+            output_index += int(raw[output_index - count_chars:output_index], 16) * self.INPUT_CHARS
+            end = output_index + count_chars
+            end += int(raw[output_index:end], 16) * self.OUTPUT_CHARS
+            spans.append((start, end))
+            start = end
+        return tuple(spans)
+
+    @property
+    def raw_transactions(self):
+        return self.raw_block[self.TX_INDEX:self.tx_spans[-1][1]]
+
+    @property
+    def tx_ids(self):
+        # New list each time, as with the Block
+        return list(self.memo('_tx_ids', lambda: tuple(
+            [sha256(self.raw_block[start:end].encode()).hexdigest() for (start, end) in self.tx_spans])))
+
+    @property
+    def mining_tx(self):
+        return self.memo('_mining_tx', lambda: self.d.read_mining_transaction(self.raw_block, self.MINING_TX_INDEX)[0])
+
+    @property
+    def transactions(self):
+        return self.memo('_transactions', lambda: tuple(
+            [self.d.read_transaction(self.raw_block, start)[0] for (start, _) in self.tx_spans[1:]]))
+
+    def transaction(self, position: int):
+        '''
+        Returns the tx at the given position in the tx ids, decoding only that tx if the transactions haven't been
+        decoded. The mining tx is at position 0.
+        '''
+        if position == 0:
+            return self.mining_tx
+        if self._transactions is not None:
+            return self._transactions[position - 1]
+        return self.d.read_transaction(self.raw_block, self.tx_spans[position][0])[0]
+
+    @property
+    def to_json(self):
+        # Transactions
+        tx_dict = {
+            "mining_tx": json.loads(self.mining_tx.to_json),
+            "tx_count": len(self.transactions)
+        }
+        for x in range(len(self.transactions)):
+            tx_dict.update({
+                f'tx_{x}': json.loads(self.transactions[x].to_json)
+            })
+
+        # Block
+        block_dict = {
+            "id": self.id,
+            "header": json.loads(self.header.to_json),
+            "transactions": tx_dict
+        }
+        return json.dumps(block_dict)
@@ -4,13 +4,13 @@ The Blockchain Class
 
 import logging
 
-from basicblockchains_ecc.elliptic_curve import secp256k1
-
 from block import Block
+from block_view import BlockView
 from database import DataBase
 from decoder import Decoder
 from formatter import Formatter
 from transactions import MiningTransaction
+from verifier import Verifier
 from wallet import Wallet
 
 
@@ -31,7 +31,7 @@ class Blockchain():
     d = Decoder()
     f = Formatter()
 
-    def __init__(self, dir_path=DIR_PATH, db_file=DB_FILE, logger=None):
+    def __init__(self, dir_path=DIR_PATH, db_file=DB_FILE, verify_workers=None, logger=None):
         # Logging
         if logger:
             self.logger = logger.getChild('Blockchain')
@@ -42,8 +42,8 @@ class Blockchain():
 
         self.logger.debug(f'Logger instantiated in blockchain with name: {self.logger.name}')
 
-        # Curve for cryptography
-        self.curve = secp256k1()
+        # Verifier for block signatures
+        self.verifier = Verifier(workers=verify_workers, logger=self.logger)
 
         # Fixed heartbeat for Blockchain
         self.heartbeat = self.f.HEARTBEAT
@@ -53,12 +53,15 @@ class Blockchain():
         self.mining_reward = 0
         self.target = self.f.target_from_parts(self.f.STARTING_TARGET_COEFFICIENT, self.f.STARTING_TARGET_EXPONENT)
         self.height = -1
+        self.chain_work = 0
 
         # Create chain list to hold last HEARTBEAT blocks
         self.chain = []
 
-        # Create fork list to index forked blocks
-        self.forks = []
+        # Create fork tree to index forked blocks by id and by prev_id, with the chain work of each forked block
+        self.fork_blocks = {}
+        self.fork_children = {}
+        self.fork_work = {}
 
         # Set path and filename variables
         self.dir_path = dir_path
@@ -80,6 +83,14 @@ class Blockchain():
     def last_block(self):
         return self.chain[-1]
 
+    @property
+    def forks(self):
+        '''
+        The forked blocks as a list of {height: raw_block} dicts ordered by height
+        '''
+        fork_list = sorted(self.fork_blocks.values(), key=lambda fork_block: fork_block.height)
+        return [{fork_block.height: fork_block.raw_block} for fork_block in fork_list]
+
     # --- BLOCK METHODS --- #
 
     def validate_block(self, block: Block) -> bool:
@@ -89,7 +100,13 @@ class Blockchain():
             self.logger.warning('Block failed validation. Block.prev_id != last_block.id')
             return False
 
-        # Check target
+        # Check target - the block target is used to compare the work in forks
+        if block.target != self.target:
+            # Logging
+            self.logger.warning('Block failed validation. Block target incorrect')
+            return False
+
+        # Check id
         if int(block.id, 16) > self.target:
             # Logging
             self.logger.warning('Block failed validation. Block id bigger than target')
@@ -126,8 +143,24 @@ class Blockchain():
             self.logger.warning('Block timestamp too far ahead.')
             return False
 
-        # Check each tx
+        # Check raw block is lowercase hex - it is saved in the binary format
+        try:
+            self.f.to_binary(block.raw_block)
+        except ValueError:
+            # Logging
+            self.logger.warning('Block failed validation. Raw block is not lowercase hex.')
+            return False
+
+        # Check tx ids are unique - each tx id is a primary key in the db
+        if len(set(block.tx_ids)) != len(block.tx_ids):
+            # Logging
+            self.logger.warning('Block failed validation. Duplicate transaction in block.')
+            return False
+
+        # Check each tx - signatures are collected and verified together once the other checks pass
         fees = 0
+        spent_utxos = set()
+        signatures = []
         for tx in block.transactions:
             input_amount = 0
             output_amount = 0
@@ -138,6 +171,13 @@ class Blockchain():
                 signature = input_utxo.signature
                 cpk, ecdsa_tuple = self.d.decode_signature(signature)
 
+                # Check utxo isn't spent twice in the block
+                if (tx_id, index) in spent_utxos:
+                    # Logging
+                    self.logger.warning(f'Utxo output with tx_id {tx_id} and index {index} spent twice in block.')
+                    return False
+                spent_utxos.add((tx_id, index))
+
                 # Check utxo_exists
                 utxo_dict = self.chain_db.get_utxo(tx_id, index)
 
@@ -150,18 +190,15 @@ class Blockchain():
 
                 # Verify address
                 utxo_address = utxo_dict['address']
-                temp_address = self.f.address(cpk)
+                temp_address = self.f.cpk_address(cpk)
                 if temp_address != utxo_address:
                     # Logging
                     self.logger.warning(
                         f'Address in utxo {utxo_address} does not match address generated from signature: {temp_address}')
                     return False
 
-                # Verify signature
-                if not self.curve.verify_signature(ecdsa_tuple, tx_id, self.curve.decompress_point(cpk)):
-                    # Logging
-                    self.logger.warning('Decoded signature fails to verify against cryptographic curve.')
-                    return False
+                # Save signature
+                signatures.append((signature, tx_id))
 
                 # Update amount
                 input_amount += utxo_dict['amount']
@@ -185,6 +222,12 @@ class Blockchain():
                 f'Validation fails. Block fees incorrect. Calculated fees{fees}; mining tx fees {block.mining_tx.block_fees}')
             return False
 
+        # Verify signatures
+        if not self.verifier.verify(signatures):
+            # Logging
+            self.logger.warning('Decoded signature fails to verify against cryptographic curve.')
+            return False
+
         return True
 
     def add_block(self, block: Block, loading=False) -> bool:
@@ -201,51 +244,26 @@ class Blockchain():
         # Account for fork block
         elif max(1, self.height - self.f.HEARTBEAT) <= block.height <= self.height:
             self.create_fork(block)
-            return False
+            fork_block = self.handle_fork(block)
+            self.cleanup_forks()
+            return fork_block
         else:
             # Validate Block
             valid_block = self.validate_block(block)
 
         if valid_block:
-            if not loading:
+            if loading:
+                self.update_chain(block)
+            else:
                 # Logging
                 self.logger.info(f'Successfully added block with id {block.id} at height {block.height}')
-                # Consume UTXOS
-                for tx in block.transactions:
-                    # Consume UTXOS in tx inputs
-                    for utxo_input in tx.inputs:
-                        self.chain_db.delete_utxo(utxo_input.tx_id, utxo_input.index)
-
-                    # Add UTXOS in tx outputs
-                    for utxo_output in tx.outputs:
-                        self.chain_db.post_utxo(tx.id, tx.outputs.index(utxo_output), utxo_output)
-
-                # Add UTXOs in Mining Tx
-                self.chain_db.post_utxo(block.mining_tx.id, 0, block.mining_tx.mining_utxo)
-
-                # Save block the chain_db
-                self.chain_db.post_block(block)
-
-            # Save block to mem_chain
-            self.chain.append(block)
-
-            # Adjust height
-            self.height += 1
-
-            # Adjust total_mining_amount
-            self.total_mining_amount -= block.mining_tx.reward
-
-            # Update reward
-            if self.height % self.f.HALVING_NUMBER == 0 or self.mining_reward > self.total_mining_amount:
-                self.update_reward()
-
-            # Update target
-            # Adjust target every heartbeat blocks
-            if self.height % self.f.HEARTBEAT == 0:
-                self.update_target()
 
-            # Update mem_chain
-            self.update_memchain()
+                # Consume input UTXOS, add output and mining UTXOS, save block and save new chain state in one db
+                # transaction
+                with self.chain_db.transaction():
+                    self.chain_db.apply_block(block)
+                    self.update_chain(block)
+                    self.save_chain_state()
 
             # Cleanup forks
             self.cleanup_forks()
@@ -274,41 +292,43 @@ class Blockchain():
         # Remove top most block from mem
         removed_block = self.chain.pop(-1)
 
-        # Add reward
-        self.total_mining_amount += removed_block.mining_tx.reward
-
-        # Remove mining utxo from db
-        self.chain_db.delete_utxo(removed_block.mining_tx.id, 0)
-
-        # Remove output utxos and restore inputs for each transaction
-        for tx in removed_block.transactions:
-            # Outputs
-            for utxo_output in tx.outputs:
-                self.chain_db.delete_utxo(tx.id, tx.outputs.index(utxo_output))
-
-            # Inputs
-            for utxo_input in tx.inputs:
-                tx_id = utxo_input.tx_id
-                tx_index = utxo_input.index
-
-                temp_tx = self.get_tx_by_id(tx_id)
-                type = int(temp_tx.raw_tx[:self.f.TYPE_CHARS], 16)
-                if type == self.f.MINING_TX_TYPE:
-                    utxo_output = temp_tx.mining_utxo
-                else:
-                    utxo_output = temp_tx.outputs[tx_index]
-
-                # Database
-                self.chain_db.post_utxo(tx_id, tx_index, utxo_output)
-
-        # Remove block from db
-        self.chain_db.delete_block()
+        # Restore dynamic values saved at new height
+        state_dict = self.chain_db.get_chain_state(self.height)
+        if state_dict:
+            self.target = state_dict['target']
+            self.mining_reward = state_dict['mining_reward']
+            self.total_mining_amount = state_dict['total_mining_amount']
+            self.chain_work = state_dict['chain_work']
+        else:
+            # Add reward
+            self.total_mining_amount += removed_block.mining_tx.reward
+            self.chain_work -= self.f.work_from_target(removed_block.target)
+
+        # Restore the utxos consumed by the block from its undo records
+        input_count = sum([tx.input_count for tx in removed_block.transactions])
+        if self.chain_db.get_undo_count(self.height + 1) == input_count:
+            self.chain_db.revert_block(removed_block)
+        else:
+            # Blocks saved without undo records find the consumed utxos from their transactions
+            restored_utxos = []
+            for tx in removed_block.transactions:
+                for utxo_input in tx.inputs:
+                    tx_id = utxo_input.tx_id
+                    tx_index = utxo_input.index
+
+                    temp_tx = self.get_tx_by_id(tx_id)
+                    if isinstance(temp_tx, MiningTransaction):
+                        utxo_output = temp_tx.mining_utxo
+                    else:
+                        utxo_output = temp_tx.outputs[tx_index]
+                    restored_utxos.append((tx_id, tx_index, utxo_output))
+            self.chain_db.revert_block(removed_block, restored_utxos)
 
         # Insert block at height self.height - self.heartbeat if it exists
         if len(self.chain) < self.heartbeat + 1 and self.height > self.heartbeat:
             raw_block_dict = self.chain_db.get_raw_block(self.height - self.heartbeat)
             if raw_block_dict:
-                self.chain.insert(1, self.d.raw_block(raw_block_dict['raw_block']))
+                self.chain.insert(1, BlockView(raw_block_dict['raw_block']))
 
         # Logging
         self.logger.debug(f'Successfully removed block at height {self.height + 1}')
@@ -324,65 +344,251 @@ class Blockchain():
 
     # --- FORK METHODS --- #
 
+    def check_fork_block(self, block: Block) -> bool:
+        '''
+        Returns True if the Block id is under the Block target and the target is the one expected along its branch. The
+        work of a forked Block is taken from its target, so it's only counted after these checks.
+        '''
+        # Check id
+        if int(block.id, 16) > block.target:
+            # Logging
+            self.logger.warning(f'Fork block with id {block.id} rejected. Block id bigger than target')
+            return False
+
+        # Check target
+        if block.target != self.expected_target(block):
+            # Logging
+            self.logger.warning(f'Fork block with id {block.id} rejected. Block target incorrect')
+            return False
+        return True
+
+    def expected_target(self, block: Block):
+        '''
+        Returns the target for the Block along its branch, or None if the previous Block isn't in the chain or in the
+        forks. If the previous Block is in the forks, its target is adjusted every heartbeat blocks as in update_target,
+        using the timestamps along the branch.
+        '''
+        # Previous block in chain
+        prev_block = self.fork_blocks.get(block.prev_id)
+        if prev_block is None:
+            state_dict = self.chain_db.get_chain_state(block.height - 1)
+            if not state_dict or state_dict['block_id'] != block.prev_id:
+                return None
+            return state_dict['target']
+
+        # Previous block in forks
+        if prev_block.height == 0 or prev_block.height % self.heartbeat != 0:
+            return prev_block.target
+        first_block = self.branch_block_by_height(prev_block, prev_block.height - self.heartbeat + 1)
+        if first_block is None:
+            return None
+        return self.adjust_target(prev_block.target, prev_block.timestamp - first_block.timestamp)
+
+    def branch_block_by_height(self, block: Block, height: int):
+        '''
+        Returns the Block at the given height on the branch ending in the given Block, following the forks back to the
+        chain
+        '''
+        while block is not None and block.height > height:
+            block = self.fork_blocks.get(block.prev_id)
+        if block is None:
+            return self.get_block_by_height(height)
+        return block
+
     def create_fork(self, block: Block):
-        fork_dict = {block.height: block.raw_block}
-        if fork_dict not in self.forks:
-            self.forks.append(fork_dict)
+        # Block already in chain
+        chain_block = self.get_block_by_height(block.height)
+        if chain_block and chain_block.id == block.id:
+            return
+
+        # Check proof of work before saving the block
+        if not self.check_fork_block(block):
+            return
+
+        if block.id not in self.fork_blocks:
+            self.fork_blocks[block.id] = block
+            self.fork_children.setdefault(block.prev_id, []).append(block.id)
+            self.update_fork_work(block)
             # Logging
             self.logger.info(f'Fork created at height {block.height} for block with id {block.id}')
         else:
             # Logging
             self.logger.info(f'Block with height {block.height} and id {block.id} already in forks.')
 
+    def remove_fork(self, block_id: str, remove_children=False):
+        fork_block = self.fork_blocks.pop(block_id, None)
+        if fork_block is None:
+            return
+        self.fork_work.pop(block_id, None)
+        siblings = self.fork_children.get(fork_block.prev_id, [])
+        if block_id in siblings:
+            siblings.remove(block_id)
+        if not siblings:
+            self.fork_children.pop(fork_block.prev_id, None)
+        if remove_children:
+            for child_id in self.fork_children.get(block_id, []).copy():
+                self.remove_fork(child_id, remove_children=True)
+
+    def fork_branch(self, block: Block) -> list:
+        '''
+        Returns the list of Blocks in the fork tree leading to the given Block, ending with the Block
+        '''
+        branch = [block]
+        prev_id = block.prev_id
+        while prev_id in self.fork_blocks and len(branch) <= self.heartbeat:
+            parent_block = self.fork_blocks[prev_id]
+            branch.append(parent_block)
+            prev_id = parent_block.prev_id
+        branch.reverse()
+        return branch
+
+    def get_chain_work(self, block: Block):
+        '''
+        Returns the chain work ending in the Block, or None if the previous Block isn't in the chain or in the forks
+        with known chain work. The Block must pass the fork block checks for its work to be counted.
+        '''
+        if not self.check_fork_block(block):
+            return None
+        prev_work = self.fork_work.get(block.prev_id)
+        if prev_work is None:
+            state_dict = self.chain_db.get_chain_state(block.height - 1)
+            if not state_dict or state_dict['block_id'] != block.prev_id:
+                return None
+            prev_work = state_dict['chain_work']
+        return prev_work + self.f.work_from_target(block.target)
+
+    def update_fork_work(self, block: Block):
+        '''
+        Save the chain work of a forked Block, and of its children in the forks if they were waiting on it
+        '''
+        block_work = self.get_chain_work(block)
+        if block_work is None:
+            return
+        self.fork_work[block.id] = block_work
+        for child_id in self.fork_children.get(block.id, []):
+            self.update_fork_work(self.fork_blocks[child_id])
+
     def handle_fork(self, block: Block) -> bool:
+        '''
+        Follow the fork tree back from the Block to the chain. If the branch ending in the Block has more work than the
+        chain after the branch point, we pop the chain back to the branch point and add the branch.
+        If a branch block fails to be added, the popped blocks are added back and the failed block is removed from the
+        forks along with its children.
+        '''
         # Logging
         self.logger.info(f'Fork being handled. Height: {block.height}, Block  id: {block.id}')
 
-        # Look for block with height = block.height -1
-        forks_list = self.forks.copy()
-        candidate_fork = None
-        for dict in forks_list:
-            if self.height in dict.keys():
-                temp_block = self.d.raw_block(dict[self.height])
-                if temp_block.id == block.prev_id:
-                    candidate_fork = temp_block
-
-        # No block found, can't handle block in the forks
-        if not candidate_fork:
+        # Compare chain work
+        block_work = self.get_chain_work(block)
+        if block_work is None or block_work <= self.chain_work:
             return False
 
-        # Pop block and try candidate_fork
-        popped_block = self.chain[-1]
-        self.pop_block()
-        candidate_added = self.add_block(candidate_fork)
-        if candidate_added:
-            latest_added = self.add_block(block)
-            if latest_added:
-                # Add the popped block to forks and remove the other one
-                self.forks.remove({candidate_fork.height: candidate_fork.raw_block})
-                self.create_fork(popped_block)
+        # Find branch point in chain
+        branch = self.fork_branch(block)
+        branch_height = branch[0].height - 1
+        if branch_height >= self.height or branch_height < max(0, self.height - self.heartbeat):
+            return False
+        branch_block = self.get_block_by_height(branch_height)
+        if branch_block is None or branch_block.id != branch[0].prev_id:
+            return False
+
+        # Pop chain back to branch point
+        popped_blocks = []
+        while self.height > branch_height:
+            popped_blocks.append(self.last_block)
+            self.pop_block()
+        popped_blocks.reverse()
+
+        # Add branch
+        for x in range(len(branch)):
+            self.remove_fork(branch[x].id)
+            if not self.add_block(branch[x]):
                 # Logging
-                self.logger.info(f'Fork handled. Height: {block.height}, Block  id: {block.id}')
-                return True
-            # Fail to add block, return to popped block
-            else:
-                self.pop_block()
-                self.add_block(popped_block)
+                self.logger.warning(f'Fork block at height {branch[x].height} failed to be added. Restoring chain.')
+
+                # Remove failed block and children
+                self.remove_fork(branch[x].id, remove_children=True)
+
+                # Return to popped blocks and restore added blocks to forks
+                while self.height > branch_height:
+                    self.pop_block()
+                for popped_block in popped_blocks:
+                    self.add_block(popped_block)
+                for added_block in branch[:x]:
+                    self.create_fork(added_block)
                 return False
-        # Fail to add candidate, return to popped block
-        else:
-            self.add_block(popped_block)
-            return False
+
+        # Add the popped blocks to forks
+        for popped_block in popped_blocks:
+            self.create_fork(popped_block)
+
+        # Logging
+        self.logger.info(f'Fork handled. Height: {block.height}, Block  id: {block.id}')
+        return True
 
     def cleanup_forks(self):
         # If more than heartbeat # of blocks have elapsed, remove the fork
-        fork_list = self.forks.copy()
-        for fork_dict in fork_list:
-            fork_height = list(fork_dict.keys())[0]
-            if fork_height + self.heartbeat < self.height:
-                self.forks.remove(fork_dict)
+        for block_id in list(self.fork_blocks.keys()):
+            if block_id in self.fork_blocks and self.fork_blocks[block_id].height + self.heartbeat < self.height:
+                self.remove_fork(block_id)
 
     # --- UPDATES --- #
+    def update_chain(self, block: Block):
+        '''
+        Update the mem chain and the dynamic Blockchain values for a new Block
+        '''
+        # Save block to mem_chain
+        self.chain.append(block)
+
+        # Adjust height
+        self.height += 1
+
+        # Adjust total_mining_amount
+        self.total_mining_amount -= block.mining_tx.reward
+
+        # Adjust chain work
+        self.chain_work += self.f.work_from_target(block.target)
+
+        # Update reward
+        if self.height % self.f.HALVING_NUMBER == 0 or self.mining_reward > self.total_mining_amount:
+            self.update_reward()
+
+        # Update target
+        # Adjust target every heartbeat blocks
+        if self.height % self.f.HEARTBEAT == 0:
+            self.update_target()
+
+        # Update mem_chain
+        self.update_memchain()
+
+    def chain_state_row(self) -> tuple:
+        return self.chain_db.chain_state_row(self.height, self.last_block.id, self.target, self.mining_reward,
+                                             self.total_mining_amount, self.chain_work)
+
+    def save_chain_state(self):
+        self.chain_db.post_chain_states([self.chain_state_row()])
+
+    @property
+    def chain_state(self) -> dict:
+        return {
+            "height": self.height,
+            "block_id": self.last_block.id,
+            "target": self.target,
+            "mining_reward": self.mining_reward,
+            "total_mining_amount": self.total_mining_amount,
+            "chain_work": self.chain_work
+        }
+
+    def check_chain_state(self) -> bool:
+        '''
+        Returns True if the db height agrees with the Blockchain and the chain state saved at that height agrees with
+        the dynamic Blockchain values and the id of the last Block
+        '''
+        db_height = self.chain_db.get_height()['height']
+        if db_height != self.height:
+            return False
+        return self.chain_db.get_chain_state(db_height) == self.chain_state
+
     def update_reward(self):
         # Genesis
         if self.mining_reward == 0:
@@ -417,9 +623,8 @@ class Blockchain():
         first_block_time = self.chain[-self.heartbeat].timestamp
         elapsed_time = last_block_time - first_block_time
 
-        # Get absolute difference between desired time
+        # Get desired time
         desired_time = pow(self.heartbeat, 2)
-        abs_diff = abs(elapsed_time - desired_time)
 
         # Logging
         self.logger.info(f'Total time (in seconds) between saving last {self.heartbeat} blocks: {elapsed_time}')
@@ -427,14 +632,25 @@ class Blockchain():
         self.logger.info(f'Difference in total and desired time: {elapsed_time - desired_time}')
 
         # Adjust either up or down
-        if elapsed_time - desired_time > 0:  # Took longer than expected, raise target | higher target = easier
+        if elapsed_time != desired_time:
             # Logging
-            self.logger.info(f'Updating target. Adjusting target up by {abs_diff}')
-            self.target = self.f.adjust_target_up(self.target, abs_diff)
+            self.logger.info(f'Updating target. Adjusting target by {elapsed_time - desired_time}')
+            self.target = self.adjust_target(self.target, elapsed_time)
+
+    def adjust_target(self, target: int, elapsed_time: int) -> int:
+        '''
+        Returns the target adjusted by the difference between the elapsed and desired time to mine heartbeat blocks
+        '''
+        # Get absolute difference between desired time
+        desired_time = pow(self.heartbeat, 2)
+        abs_diff = abs(elapsed_time - desired_time)
+
+        # Adjust either up or down
+        if elapsed_time - desired_time > 0:  # Took longer than expected, raise target | higher target = easier
+            return self.f.adjust_target_up(target, abs_diff)
         elif elapsed_time - desired_time < 0:  # Took shorter than expected, lower target | lower target = harder
-            # Logging
-            self.logger.info(f'Updating target. Adjusting target down by {abs_diff}')
-            self.target = self.f.adjust_target_down(self.target, abs_diff)
+            return self.f.adjust_target_down(target, abs_diff)
+        return target
 
     def update_memchain(self):
         # Only keep last heartbeat blocks in mem chain and genesis block at index 0
@@ -444,55 +660,105 @@ class Blockchain():
     # --- SEARCH METHODS --- #
     def find_block_by_tx_id(self, tx_id: str):
         '''
-        Will return a Block if the tx_id is in its list. Otherwise, return None
-        Searches through db.
+        Will return a Block or BlockView if the tx_id is in its list. Otherwise, return None
+        Uses the tx locations in the db.
         '''
-        temp_height = self.height
-        block = None
-        block_found = False
+        location_dict = self.chain_db.get_tx_location(tx_id)
+        if not location_dict:
+            return None
+        return self.get_block_by_height(location_dict['height'])
 
-        while temp_height > -1 and not block_found:
-            # Search through database
-            raw_block_dict = self.chain_db.get_raw_block(temp_height)
-            if raw_block_dict != {}:
-                temp_block = self.d.raw_block(raw_block_dict['raw_block'])
-            else:
-                # Return None if no block is at that height
-                return None
-
-            # Search for tx_id in Block
-            if tx_id in temp_block.tx_ids:
-                block = temp_block
-                block_found = True
-            temp_height -= 1
-        return block
+    def get_block_by_height(self, height: int):
+        '''
+        Returns the Block at the given height from the chain if it's in memory, otherwise a BlockView of the raw block
+        in the db
+        '''
+        if height > self.height or height < 0:
+            return None
+        chain_index = height - self.height - 1
+        if height == 0:
+            return self.chain[0]
+        elif -chain_index < len(self.chain) and self.chain[chain_index].height == height:
+            return self.chain[chain_index]
+        raw_block_dict = self.chain_db.get_raw_block(height)
+        if raw_block_dict:
+            return BlockView(raw_block_dict['raw_block'])
+        return None
 
     def get_tx_by_id(self, tx_id: str):
         '''
         We return the Transaction object if the tx_id is in a Block
         '''
-        tx = None
-        temp_block = self.find_block_by_tx_id(tx_id)
-        if temp_block:
-            # Check for mining tx
-            if temp_block.mining_tx.id == tx_id:
-                tx = temp_block.mining_tx
-            else:
-                tx_index = temp_block.tx_ids.index(tx_id) - 1  # -1 to account for mining tx
-                tx = temp_block.transactions[tx_index]
-        return tx
+        location_dict = self.chain_db.get_tx_location(tx_id)
+        if not location_dict:
+            return None
+        temp_block = self.get_block_by_height(location_dict['height'])
+        if temp_block is None:
+            return None
+
+        # Mining tx is at position 0
+        return temp_block.transaction(location_dict['position'])
 
     # --- LOAD CHAIN --- #
     def load_chain(self):
         '''
         If we are loading the chain, then the db is not available to be written to yet. Hence, we are not concerned
         with any DB locking operational errors, so db statements are not enclosed in a try/catch block.
+        The dynamic values are restored from the chain state saved at the db height and only the last HEARTBEAT blocks
+        are viewed, without decoding their transactions. If there is no saved chain state, or its block id doesn't match
+        the last block in the db, the chain is replayed from the db.
         '''
-        self.logger.info(f'Loading blockchain from database.')
+        self.logger.info('Loading blockchain from database.')
 
         # Get height
         db_height = self.chain_db.get_height()['height']
 
+        state_dict = self.chain_db.get_chain_state(db_height)
+        if not state_dict:
+            # Logging
+            self.logger.warning(f'No chain state saved at height {db_height}.')
+            self.replay_chain(db_height)
+        elif not self.load_chain_state(state_dict):
+            # Logging
+            self.logger.critical(f'Chain state at height {db_height} does not match the db.')
+            self.replay_chain(db_height)
+
+        self.logger.info(f'Successfully loaded Blockchain from database. Current height: {self.height}')
+
+    def load_chain_state(self, state_dict: dict) -> bool:
+        '''
+        Restore the dynamic values from the state_dict and add views of the last HEARTBEAT blocks to the mem chain.
+        Returns False without changing the Blockchain if the block id in the state_dict doesn't match the last block.
+        '''
+        height = state_dict['height']
+        start_height = max(0, height - self.heartbeat + 1)
+        raw_blocks = self.chain_db.get_raw_blocks(start_height, height)
+        blocks = [BlockView(raw_block) for raw_block in raw_blocks]
+
+        # Verify tip
+        if not blocks or blocks[-1].id != state_dict['block_id']:
+            return False
+
+        # Genesis block stays at index 0
+        if start_height == 0:
+            blocks.pop(0)
+        self.chain = self.chain[:1] + blocks
+
+        self.height = height
+        self.target = state_dict['target']
+        self.mining_reward = state_dict['mining_reward']
+        self.total_mining_amount = state_dict['total_mining_amount']
+        self.chain_work = state_dict['chain_work']
+        return True
+
+    def replay_chain(self, db_height: int):
+        '''
+        Add every block in the db to the chain and save the chain state at each height
+        '''
+        # Logging
+        self.logger.info('Replaying blockchain from database.')
+
+        chain_state_rows = [self.chain_state_row()]
         while self.height < db_height:
             raw_block_dict = self.chain_db.get_raw_block(self.height + 1)
             if raw_block_dict:
@@ -501,8 +767,9 @@ class Blockchain():
                     # Logging
                     self.logger.critical(f'Error loading raw block from db at height {self.height + 1}')
                     break
+                chain_state_rows.append(self.chain_state_row())
             else:
                 self.logger.critical(f'No raw block returned at height {self.height + 1}')
                 break
 
-        self.logger.info(f'Successfully loaded Blockchain from database. Current height: {self.height}')
+        self.chain_db.post_chain_states(chain_state_rows)
@@ -0,0 +1,68 @@
+'''
+The LRUCache class
+'''
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    '''
+    A bounded mapping which drops the least recently used key once it holds maxsize keys. The cache is shared between
+    threads, so every access takes the lock. Hits and misses are counted on get.
+    '''
+    # Default number of keys
+    MAXSIZE = pow(2, 16)
+
+    def __init__(self, maxsize=MAXSIZE):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+        # Telemetry
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+    @property
+    def stats(self):
+        return {
+            "size": len(self.data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate
+        }
+
+    def get(self, key, default=None):
+        with self.lock:
+            try:
+                value = self.data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.hits = 0
+            self.misses = 0
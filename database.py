@@ -3,11 +3,13 @@
 The Database Class. Using SQLite
 '''
 import sqlite3
-from contextlib import closing
-from os.path import join
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
 from block import Block
+from block_view import BlockView
+from decoder import Decoder
 from formatter import Formatter
 from utxo import UTXO_OUTPUT
 
@@ -17,22 +19,104 @@ class DataBase:
     '''
     The DataBase object is instantiated with a directory path and file name for the db.
 
-    The db has the following 2 tables:
+    The db has the following 5 tables:
         1) Raw Blocks
         2) UTXO Pool
+        3) Tx Locations
+        4) Chain State
+        5) Block Undo
 
     These tables have the following column structure:
 
     Raw Blocks: | raw_block |
     UTXO Pool: | tx_id | tx_index | amount | address | block_height |
-
-    All variables are text variables (aka: strings). Where appropriate, inputs to functions are their respective
-    integers. But as SQLite has max integers size of 2^63-1, all integers are stored in the db as hex strings.
-
+    Tx Locations: | tx_id | height | position |
+    Chain State: | height | block_id | target | mining_reward | total_mining_amount | chain_work |
+    Block Undo: | height | tx_id | tx_index | amount | address | block_height |
+
+    The Tx Locations table indexes every tx in the chain by the height of its Block and its position in Block.tx_ids,
+    where the mining tx is at position 0.
+    The Chain State table saves the dynamic Blockchain values after the Block at each height was added, so the
+    Blockchain can be loaded without replaying the chain. The chain_work is the total work of the chain up to and
+    including the Block. The target, mining_reward, total_mining_amount and chain_work are saved as hex strings.
+    The Block Undo table saves the exact UTXO Pool rows consumed by the Block at each height, so they can be restored
+    when the Block is removed.
+
+    The raw_block is saved in the binary format of the Formatter, half the size of the raw block string, and the
+    address is text. The tx_id is stored as its 32 bytes and the tx_index as an integer, with (tx_id, tx_index) the
+    primary key of the UTXO Pool. As SQLite has max integer size of 2^63-1, the amount and
+    block_height are stored as fixed-width big-endian blobs, which compare in the same order as their integers. The UTXO
+    Pool is indexed by address and by block_height. The tx_id is the primary key of the Tx Locations.
+    Inputs to and outputs from functions are always the hex string tx_id and the respective integers.
+
+    The schema version is saved in the db user_version. Dbs with an older schema are migrated when opened.
+
+    Each thread keeps one long-lived connection to the db, which caches the prepared statements for its queries.
     '''
-    # Formatter
+    # Decoder and Formatter
+    d = Decoder()
     f = Formatter()
 
+    # Prepared statements cached per connection
+    CACHED_STATEMENTS = 256
+
+    # Schema version saved as user_version - version 0 stores all utxo values as hex strings, version 1 has no tx_locations,
+    # version 2 has no chain_state, version 3 has no block_undo, version 4 has no chain_work, version 5 stores raw blocks
+    # as hex strings
+    SCHEMA_VERSION = 6
+    TABLES = ['raw_blocks', 'utxo_pool', 'tx_locations', 'chain_state', 'block_undo']
+
+    # Blob sizes
+    AMOUNT_BYTES = Formatter.AMOUNT_CHARS // 2
+    HEIGHT_BYTES = Formatter.HEIGHT_CHARS // 2
+
+    # Raw Blocks schema
+    RAW_BLOCKS_TABLE = """CREATE TABLE raw_blocks(
+                    raw_block blob
+                    )"""
+
+    # UTXO Pool schema
+    UTXO_POOL_TABLE = """CREATE TABLE utxo_pool (
+                    tx_id blob NOT NULL,
+                    tx_index integer NOT NULL,
+                    amount blob NOT NULL,
+                    address text NOT NULL,
+                    block_height blob NOT NULL,
+                    PRIMARY KEY (tx_id, tx_index)
+                    )"""
+    UTXO_POOL_INDEXES = [
+        """CREATE INDEX utxo_address ON utxo_pool(address)""",
+        """CREATE INDEX utxo_block_height ON utxo_pool(block_height)"""
+    ]
+
+    # Tx Locations schema
+    TX_LOCATIONS_TABLE = """CREATE TABLE tx_locations (
+                    tx_id blob PRIMARY KEY,
+                    height integer NOT NULL,
+                    position integer NOT NULL
+                    ) WITHOUT ROWID"""
+
+    # Chain State schema
+    CHAIN_STATE_TABLE = """CREATE TABLE chain_state (
+                    height integer PRIMARY KEY,
+                    block_id blob NOT NULL,
+                    target text NOT NULL,
+                    mining_reward text NOT NULL,
+                    total_mining_amount text NOT NULL,
+                    chain_work text NOT NULL
+                    )"""
+
+    # Block Undo schema - utxo_pool rows keyed by height
+    BLOCK_UNDO_TABLE = """CREATE TABLE block_undo (
+                    height integer NOT NULL,
+                    tx_id blob NOT NULL,
+                    tx_index integer NOT NULL,
+                    amount blob NOT NULL,
+                    address text NOT NULL,
+                    block_height blob NOT NULL,
+                    PRIMARY KEY (height, tx_id, tx_index)
+                    ) WITHOUT ROWID"""
+
     def __init__(self, dir_path: str, db_file: str):
         # Create directory if it doesn't exist
         Path(dir_path).mkdir(parents=True, exist_ok=True)
@@ -40,61 +124,216 @@ class DataBase:
         # Get file_path for future use
         self.file_path = Path(dir_path, db_file).absolute().as_posix()
 
+        # Connection for each thread
+        self.local = threading.local()
+
         # Verify db
-        if self.get_tables() != ['raw_blocks', 'utxo_pool']:
+        table_set = set(self.get_tables())
+        if self.schema_version < self.SCHEMA_VERSION and {'raw_blocks', 'utxo_pool'} <= table_set:
+            self.migrate_db()
+        elif table_set != set(self.TABLES):
             self.wipe_db()
             self.create_db()
 
     def wipe_db(self):
         table_list = self.get_tables()
 
-        conn = sqlite3.connect(self.file_path)
-        c = conn.cursor()
-
         for table_name in table_list:
             command = f"""DROP TABLE {table_name}"""
-            c.execute(command)
-            conn.commit()
-
-        conn.close()
+            self.query_db(command)
+        self.query_db("""PRAGMA user_version = 0""")
 
     def create_db(self):
-        conn = sqlite3.connect(self.file_path)
-        c = conn.cursor()
-
         # Table 1
-        c.execute("""CREATE TABLE raw_blocks(
-                    raw_block text
-                    )""")
-        conn.commit()
+        self.query_db(self.RAW_BLOCKS_TABLE)
 
         # Table 2
-        c.execute("""CREATE TABLE utxo_pool (
-                    tx_id text,
-                    tx_index text,
-                    amount text,
-                    address text,
-                    block_height text
-                    )""")
-        conn.commit()
-
-        conn.close()
+        self.query_db(self.UTXO_POOL_TABLE)
+        for index_query in self.UTXO_POOL_INDEXES:
+            self.query_db(index_query)
+
+        # Table 3
+        self.query_db(self.TX_LOCATIONS_TABLE)
+
+        # Table 4
+        self.query_db(self.CHAIN_STATE_TABLE)
+
+        # Table 5
+        self.query_db(self.BLOCK_UNDO_TABLE)
+
+        # Schema version
+        self.query_db(f"""PRAGMA user_version = {self.SCHEMA_VERSION}""")
+
+    @property
+    def schema_version(self) -> int:
+        (version,) = self.query_db("""PRAGMA user_version""")[0]
+        return version
+
+    def migrate_db(self):
+        '''
+        Migrate an older db to the current schema, one version at a time
+        '''
+        if self.schema_version < 1:
+            self.migrate_utxo_pool()
+        if self.schema_version < 2:
+            self.query_db(self.TX_LOCATIONS_TABLE)
+            self.rebuild_tx_locations()
+            self.query_db("""PRAGMA user_version = 2""")
+        if self.schema_version < 3:
+            # Chain state is saved by the Blockchain the first time the chain is loaded
+            self.query_db(self.CHAIN_STATE_TABLE)
+            self.query_db("""PRAGMA user_version = 3""")
+        if self.schema_version < 4:
+            # Blocks added before version 4 have no undo records
+            self.query_db(self.BLOCK_UNDO_TABLE)
+            self.query_db("""PRAGMA user_version = 4""")
+        if self.schema_version < 5:
+            # Chain state is saved again with the chain_work the next time the chain is loaded
+            self.query_db("""DROP TABLE chain_state""")
+            self.query_db(self.CHAIN_STATE_TABLE)
+            self.query_db("""PRAGMA user_version = 5""")
+        if self.schema_version < 6:
+            self.migrate_raw_blocks()
+
+    def migrate_utxo_pool(self):
+        '''
+        Migrate a version 0 db, where every utxo value is a hex string, to version 1 in a single transaction
+        '''
+        con = self.connection
+        with con:
+            # Explicit transaction so the schema changes are rolled back on failure
+            con.execute("""BEGIN""")
+            con.execute("""ALTER TABLE utxo_pool RENAME TO utxo_pool_v0""")
+            con.execute(self.UTXO_POOL_TABLE)
+            old_rows = con.execute("""SELECT * FROM utxo_pool_v0 ORDER BY rowid""")
+            con.executemany("""INSERT OR REPLACE INTO utxo_pool VALUES (?,?,?,?,?)""", (
+                (bytes.fromhex(tx_id), int(h_index, 16), self.amount_blob(int(h_amount, 16)), address,
+                 self.height_blob(int(h_block_height, 16)))
+                for (tx_id, h_index, h_amount, address, h_block_height) in old_rows
+            ))
+            con.execute("""DROP TABLE utxo_pool_v0""")
+            for index_query in self.UTXO_POOL_INDEXES:
+                con.execute(index_query)
+            con.execute("""PRAGMA user_version = 1""")
+
+    def migrate_raw_blocks(self):
+        '''
+        Migrate a version 5 db, where the raw blocks are hex strings, to version 6 in a single transaction. The rowid of
+        each raw block is its height + 1, so rowids are kept.
+        '''
+        con = self.connection
+        with con:
+            # Explicit transaction so the schema changes are rolled back on failure
+            con.execute("""BEGIN""")
+            con.execute("""ALTER TABLE raw_blocks RENAME TO raw_blocks_v5""")
+            con.execute(self.RAW_BLOCKS_TABLE)
+            old_rows = con.execute("""SELECT rowid, raw_block FROM raw_blocks_v5 ORDER BY rowid""")
+            con.executemany("""INSERT INTO raw_blocks(rowid, raw_block) VALUES (?,?)""", (
+                (rowid, self.raw_block_blob(raw_block)) for (rowid, raw_block) in old_rows
+            ))
+            con.execute("""DROP TABLE raw_blocks_v5""")
+            con.execute("""PRAGMA user_version = 6""")
+
+    # --- CONNECTIONS --- #
+
+    @property
+    def connection(self):
+        '''
+        Returns the connection for the calling thread, creating it on first use.
+        WAL journaling lets the connections in other threads read while one thread writes.
+        '''
+        con = getattr(self.local, 'connection', None)
+        if con is None:
+            con = sqlite3.connect(self.file_path, cached_statements=self.CACHED_STATEMENTS)
+            con.execute("""PRAGMA journal_mode=WAL""")
+            self.local.connection = con
+        return con
+
+    def close(self):
+        '''
+        Close the connection for the calling thread
+        '''
+        con = getattr(self.local, 'connection', None)
+        if con is not None:
+            con.close()
+            self.local.connection = None
+
+    # --- TRANSACTIONS --- #
+
+    @property
+    def in_transaction(self):
+        return getattr(self.local, 'in_transaction', False)
+
+    @contextmanager
+    def transaction(self):
+        '''
+        Groups every query made in the calling thread inside the context into a single transaction. The transaction is
+        committed when the context exits, or rolled back if an exception is raised.
+        The write lock is taken up front, so the queries inside the transaction don't need to retry. Nested contexts
+        join the outer transaction.
+        '''
+        if self.in_transaction:
+            yield
+            return
+
+        con = self.connection
+        transaction_started = False
+        while not transaction_started:
+            try:
+                con.execute("""BEGIN IMMEDIATE""")
+                transaction_started = True
+            except sqlite3.OperationalError:
+                pass
+
+        self.local.in_transaction = True
+        try:
+            with con:
+                yield
+        finally:
+            self.local.in_transaction = False
 
     # --- GENERIC METHODS --- #
 
     def query_db(self, query: str, data=None):
-        with closing(sqlite3.connect(self.file_path)) as con, con, closing(con.cursor()) as cur:
-            query_executed = False
-            while not query_executed:
-                try:
+        con = self.connection
+        if self.in_transaction:
+            cur = con.execute(query, data) if data else con.execute(query)
+            return cur.fetchall()
+
+        query_executed = False
+        while not query_executed:
+            try:
+                with con:
                     if data:
-                        cur.execute(query, data)
+                        cur = con.execute(query, data)
                     else:
-                        cur.execute(query)
-                    query_executed = True
-                except sqlite3.OperationalError:
-                    pass
-            return cur.fetchall()
+                        cur = con.execute(query)
+                    result = cur.fetchall()
+                query_executed = True
+            except sqlite3.OperationalError:
+                pass
+        return result
+
+    def transaction_db(self, statements: list):
+        '''
+        Executes a list of (query, list_of_data_tuples) pairs in a single transaction using executemany.
+        Either every statement is committed or none are.
+        '''
+        con = self.connection
+        if self.in_transaction:
+            for query, data_list in statements:
+                con.executemany(query, data_list)
+            return
+
+        transaction_executed = False
+        while not transaction_executed:
+            try:
+                with con:
+                    for query, data_list in statements:
+                        con.executemany(query, data_list)
+                transaction_executed = True
+            except sqlite3.OperationalError:
+                pass
 
     def get_tables(self):
         table_list = []
@@ -108,6 +347,17 @@ class DataBase:
 
     # --- RAW BLOCKS --- #
 
+    def raw_block_blob(self, raw_block: str) -> bytes:
+        return self.f.to_binary(raw_block)
+
+    def raw_block_hex(self, raw_block) -> str:
+        '''
+        Returns the raw block string of a saved raw block. Dbs before version 6 save the raw block string.
+        '''
+        if isinstance(raw_block, str):
+            return raw_block
+        return self.f.from_binary(raw_block)
+
     # GET METHODS
     def get_height(self):
         query = """SELECT COUNT(*) FROM raw_blocks"""
@@ -118,23 +368,39 @@ class DataBase:
         }
         return height_dict
 
+    def get_raw_blocks(self, start_height: int, end_height: int) -> list:
+        '''
+        Returns the list of raw blocks from start_height to end_height inclusive
+        '''
+        query = """SELECT raw_block from raw_blocks where rowid BETWEEN ? AND ? ORDER BY rowid"""
+        raw_block_tuple_list = self.query_db(query, (start_height + 1, end_height + 1))
+        return [self.raw_block_hex(raw_block) for (raw_block,) in raw_block_tuple_list]
+
     def get_raw_block(self, height: int):
-        query = """SELECT raw_block from raw_blocks where rowid = ?"""
-        data_tuple = (height + 1,)
-        raw_block_tuple_list = self.query_db(query, data_tuple)
         raw_block_dict = {}
-        if raw_block_tuple_list:
-            (raw_block,) = raw_block_tuple_list[0]
+        raw_block = self.get_raw_block_binary(height)
+        if raw_block is not None:
             raw_block_dict.update({
-                "raw_block": raw_block
+                "raw_block": self.raw_block_hex(raw_block)
             })
         return raw_block_dict
 
+    def get_raw_block_binary(self, height: int):
+        '''
+        Returns the raw block at the given height in the binary format, or None if there is no block at that height
+        '''
+        query = """SELECT raw_block from raw_blocks where rowid = ?"""
+        raw_block_tuple_list = self.query_db(query, (height + 1,))
+        if not raw_block_tuple_list:
+            return None
+        (raw_block,) = raw_block_tuple_list[0]
+        return raw_block
+
     # POST METHODS
     def post_block(self, block: Block):
         # Raw Block table
         raw_block_query = """INSERT INTO raw_blocks VALUES (?)"""
-        raw_block_data_tuple = (block.raw_block,)
+        raw_block_data_tuple = (self.raw_block_blob(block.raw_block),)
         self.query_db(raw_block_query, raw_block_data_tuple)
 
     # DELETE METHODS
@@ -146,59 +412,236 @@ class DataBase:
         raw_block_data_tuple = (height + 1,)
         self.query_db(raw_block_query, raw_block_data_tuple)
 
+    # --- BLOCK TRANSACTIONS --- #
+
+    def apply_block(self, block: Block):
+        '''
+        In a single transaction: save the utxos referenced by the block inputs as undo records and consume them, add
+        the utxos in the block outputs and the mining tx, and save the raw block.
+        '''
+        spent_utxos = [self.utxo_key(i.tx_id, i.index) for tx in block.transactions for i in tx.inputs]
+        created_utxos = [self.utxo_row(block.mining_tx.id, 0, block.mining_tx.mining_utxo)]
+        for tx in block.transactions:
+            tx_id = tx.id
+            created_utxos.extend([self.utxo_row(tx_id, x, tx.outputs[x]) for x in range(tx.output_count)])
+
+        # Block is saved at the next height in the db
+        height = self.get_height()['height'] + 1
+        tx_locations = self.tx_location_rows(block, height)
+
+        self.transaction_db([
+            ("""INSERT OR REPLACE INTO block_undo SELECT ?, * FROM utxo_pool WHERE tx_id = ? AND tx_index = ?""",
+             [(height,) + utxo_key for utxo_key in spent_utxos]),
+            ("""DELETE FROM utxo_pool WHERE tx_id = ? AND tx_index = ?""", spent_utxos),
+            ("""INSERT INTO utxo_pool VALUES (?,?,?,?,?)""", created_utxos),
+            ("""INSERT INTO raw_blocks VALUES (?)""", [(self.raw_block_blob(block.raw_block),)]),
+            ("""INSERT OR REPLACE INTO tx_locations VALUES (?,?,?)""", tx_locations)
+        ])
+
+    def revert_block(self, block: Block, restored_utxos=None):
+        '''
+        In a single transaction: remove the utxos created by the block, restore the utxos it consumed and delete the
+        last raw block. The consumed utxos are restored from the undo records of the block, unless restored_utxos is
+        given as a list of (tx_id, tx_index, utxo_output) tuples.
+        '''
+        created_utxos = [self.utxo_key(block.mining_tx.id, 0)]
+        for tx in block.transactions:
+            tx_id = tx.id
+            created_utxos.extend([self.utxo_key(tx_id, x) for x in range(tx.output_count)])
+
+        # Block is the last block in the db
+        height = self.get_height()['height']
+        if restored_utxos is None:
+            restore_statement = (
+                """INSERT INTO utxo_pool SELECT tx_id, tx_index, amount, address, block_height FROM block_undo
+                WHERE height = ?""", [(height,)]
+            )
+        else:
+            restore_statement = (
+                """INSERT INTO utxo_pool VALUES (?,?,?,?,?)""",
+                [self.utxo_row(tx_id, tx_index, utxo_output) for (tx_id, tx_index, utxo_output) in restored_utxos]
+            )
+
+        tx_ids = [(bytes.fromhex(tx_id),) for tx_id in block.tx_ids]
+
+        self.transaction_db([
+            ("""DELETE FROM utxo_pool WHERE tx_id = ? AND tx_index = ?""", created_utxos),
+            restore_statement,
+            ("""DELETE FROM raw_blocks WHERE rowid = (SELECT COUNT(*) FROM raw_blocks)""", [()]),
+            ("""DELETE FROM tx_locations WHERE tx_id = ?""", tx_ids),
+            ("""DELETE FROM chain_state WHERE height >= (SELECT COUNT(*) FROM raw_blocks)""", [()]),
+            ("""DELETE FROM block_undo WHERE height >= (SELECT COUNT(*) FROM raw_blocks)""", [()])
+        ])
+
+    # --- BLOCK UNDO --- #
+
+    def get_undo_count(self, height: int) -> int:
+        '''
+        Returns the number of utxos saved in the undo records of the Block at the given height
+        '''
+        query = """SELECT COUNT(*) FROM block_undo WHERE height = ?"""
+        (undo_count,) = self.query_db(query, (height,))[0]
+        return undo_count
+
+    # --- TX LOCATIONS --- #
+
+    def tx_location_rows(self, block: Block, height: int) -> list:
+        tx_ids = block.tx_ids
+        return [(bytes.fromhex(tx_ids[x]), height, x) for x in range(len(tx_ids))]
+
+    # GET METHODS
+    def get_tx_location(self, tx_id: str) -> dict:
+        '''
+        Returns the height of the Block containing the tx and the position of the tx in Block.tx_ids
+        '''
+        try:
+            b_tx_id = bytes.fromhex(tx_id)
+        except ValueError:
+            return {}
+        query = """SELECT height, position FROM tx_locations WHERE tx_id = ?"""
+        location_list = self.query_db(query, (b_tx_id,))
+        location_dict = {}
+        if location_list:
+            height, position = location_list[0]
+            location_dict.update({
+                "height": height,
+                "position": position
+            })
+        return location_dict
+
+    def rebuild_tx_locations(self):
+        '''
+        Rebuild the tx_locations from the raw_blocks in a single transaction. Used to migrate dbs without tx locations.
+        '''
+        con = self.connection
+        with con:
+            con.execute("""DELETE FROM tx_locations""")
+            raw_blocks = con.execute("""SELECT rowid, raw_block FROM raw_blocks ORDER BY rowid""")
+            for (rowid, raw_block) in raw_blocks:
+                con.executemany("""INSERT OR REPLACE INTO tx_locations VALUES (?,?,?)""",
+                                self.tx_location_rows(BlockView(self.raw_block_hex(raw_block)), rowid - 1))
+
+    # --- CHAIN STATE --- #
+
+    def chain_state_row(self, height: int, block_id: str, target: int, mining_reward: int, total_mining_amount: int,
+                        chain_work: int) -> tuple:
+        return height, bytes.fromhex(block_id), hex(target), hex(mining_reward), hex(total_mining_amount), \
+            hex(chain_work)
+
+    # GET METHODS
+    def get_chain_state(self, height: int) -> dict:
+        query = """SELECT * FROM chain_state WHERE height = ?"""
+        state_list = self.query_db(query, (height,))
+        state_dict = {}
+        if state_list:
+            height, b_block_id, h_target, h_mining_reward, h_total_mining_amount, h_chain_work = state_list[0]
+            state_dict.update({
+                "height": height,
+                "block_id": b_block_id.hex(),
+                "target": int(h_target, 16),
+                "mining_reward": int(h_mining_reward, 16),
+                "total_mining_amount": int(h_total_mining_amount, 16),
+                "chain_work": int(h_chain_work, 16)
+            })
+        return state_dict
+
+    # POST METHODS
+    def post_chain_state(self, height: int, block_id: str, target: int, mining_reward: int, total_mining_amount: int,
+                         chain_work: int):
+        query = """INSERT OR REPLACE INTO chain_state VALUES (?,?,?,?,?,?)"""
+        data_tuple = self.chain_state_row(height, block_id, target, mining_reward, total_mining_amount, chain_work)
+        self.query_db(query, data_tuple)
+
+    def post_chain_states(self, chain_state_rows: list):
+        '''
+        Saves a list of chain_state_row tuples in a single transaction
+        '''
+        self.transaction_db([("""INSERT OR REPLACE INTO chain_state VALUES (?,?,?,?,?,?)""", chain_state_rows)])
+
     # --- UTXO POOL ---#
 
+    # ENCODING METHODS
+    def amount_blob(self, amount: int) -> bytes:
+        return amount.to_bytes(self.AMOUNT_BYTES, 'big')
+
+    def height_blob(self, block_height: int) -> bytes:
+        return block_height.to_bytes(self.HEIGHT_BYTES, 'big')
+
+    def utxo_key(self, tx_id: str, tx_index: int) -> tuple:
+        return bytes.fromhex(tx_id), tx_index
+
+    def utxo_row(self, tx_id: str, tx_index: int, utxo_output: UTXO_OUTPUT) -> tuple:
+        return bytes.fromhex(tx_id), tx_index, self.amount_blob(utxo_output.amount), utxo_output.address, \
+            self.height_blob(utxo_output.block_height)
+
+    def utxo_dict(self, utxo_tuple: tuple) -> dict:
+        b_tx_id, tx_index, b_amount, address, b_block_height = utxo_tuple
+        return {
+            "tx_id": b_tx_id.hex(),
+            "tx_index": tx_index,
+            "amount": int.from_bytes(b_amount, 'big'),
+            "address": address,
+            "block_height": int.from_bytes(b_block_height, 'big')
+        }
+
     # GET METHODS
     def get_utxo(self, tx_id: str, tx_index: int) -> dict:
         query = """SELECT * FROM utxo_pool WHERE tx_id = ? AND tx_index = ?"""
-        utxo_list = self.query_db(query, (tx_id, hex(tx_index)))
+        utxo_list = self.query_db(query, self.utxo_key(tx_id, tx_index))
         utxo_dict = {}
         if utxo_list:
-            tx_id, h_index, h_amount, address, h_block_height = utxo_list[0]
-            utxo_dict.update({
-                "tx_id": tx_id,
-                "tx_index": int(h_index, 16),
-                "amount": int(h_amount, 16),
-                "address": address,
-                "block_height": int(h_block_height, 16)
-            })
+            utxo_dict.update(self.utxo_dict(utxo_list[0]))
         return utxo_dict
 
     # Used in API for /<address>/ endpoint
     def get_utxos_by_address(self, address: str) -> dict:
-        query = """SELECT tx_id, tx_index FROM utxo_pool WHERE address = ?"""
+        query = """SELECT * FROM utxo_pool WHERE address = ? ORDER BY rowid"""
         list_of_utxo_tuples = self.query_db(query, (address,))
         utxo_dict = {'address': address, 'utxo_count': len(list_of_utxo_tuples)}
 
         # Get utxos as dicts
-        for utxo_tuple in list_of_utxo_tuples:
-            tx_id, h_index = utxo_tuple
+        for x in range(len(list_of_utxo_tuples)):
             utxo_dict.update({
-                f'utxo_{list_of_utxo_tuples.index(utxo_tuple)}': self.get_utxo(tx_id, int(h_index, 16))}
-            )
+                f'utxo_{x}': self.utxo_dict(list_of_utxo_tuples[x])
+            })
 
         # Return dict
         return utxo_dict
 
     # Used in mine end of life algorithm
     def get_invested_amount(self, block_height: int):
-        query = """SELECT amount, block_height from utxo_pool WHERE length(block_height) >= ?"""
-        list_of_utxo_tuples = self.query_db(query, (len(hex(block_height)),))
+        query = """SELECT amount from utxo_pool WHERE block_height >= ?"""
+        list_of_utxo_tuples = self.query_db(query, (self.height_blob(block_height),))
+
+        # Sum in python as the total can exceed the SQLite integer size
         total_amount = 0
-        for amount_tuple in list_of_utxo_tuples:
-            (hex_amount, hex_block_height) = amount_tuple
-            if int(hex_block_height, 16) >= block_height:
-                total_amount += int(hex_amount, 16)
+        for (b_amount,) in list_of_utxo_tuples:
+            total_amount += int.from_bytes(b_amount, 'big')
         return total_amount
 
     # POST METHODS
     def post_utxo(self, tx_id: str, tx_index: int, utxo_output: UTXO_OUTPUT):
         query = """INSERT INTO utxo_pool VALUES (?,?,?,?,?)"""
-        data_tuple = (tx_id, hex(tx_index), hex(utxo_output.amount), utxo_output.address, hex(utxo_output.block_height))
+        data_tuple = self.utxo_row(tx_id, tx_index, utxo_output)
         self.query_db(query, data_tuple)
 
     # DELETE METHODS
     def delete_utxo(self, tx_id: str, tx_index: int):
         query = """DELETE FROM utxo_pool WHERE tx_id = ? AND tx_index = ?"""
-        data_tuple = (tx_id, hex(tx_index))
+        data_tuple = self.utxo_key(tx_id, tx_index)
         self.query_db(query, data_tuple)
+
+
+# --- REBUILD TX LOCATIONS --- #
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Rebuild the tx locations index of a chain db')
+    parser.add_argument('--dir_path', default='data/')
+    parser.add_argument('--db_file', default='chain.db')
+    args = parser.parse_args()
+
+    db = DataBase(args.dir_path, args.db_file)
+    db.rebuild_tx_locations()
+    print(f'Rebuilt tx locations for {db.get_height()["height"] + 1} blocks in {db.file_path}')
@@ -27,10 +27,10 @@ class Decoder:
             self.logger.setLevel('DEBUG')
 
     # Verify type version
-    def verify_type_version(self, data_type: int, data_version: str, raw_data: str) -> bool:
+    def verify_type_version(self, data_type: int, data_version: str, raw_data: str, offset=0) -> bool:
         # Type and version
-        type = int(raw_data[:self.t_index], 16)
-        version = raw_data[self.t_index:self.v_index]
+        type = int(raw_data[offset:offset + self.t_index], 16)
+        version = raw_data[offset + self.t_index:offset + self.v_index]
 
         try:
             assert type == data_type
@@ -136,106 +136,133 @@ class Decoder:
         cpk, ecdsa_tuple = self.decode_signature(signature)
 
         # Verify address
-        curve = secp256k1()
-        return curve.verify_signature(ecdsa_tuple, tx_id, curve.decompress_point(cpk))
+        return self.F.CURVE.verify_signature(ecdsa_tuple, tx_id, self.F.cpk_point(cpk))
 
     # UTXOS
     def raw_utxo_input(self, raw_utxo: str):
+        utxo_input, _ = self.read_utxo_input(raw_utxo, 0)
+        return utxo_input
+
+    def read_utxo_input(self, raw: str, offset: int):
+        '''
+        Decode the utxo_input starting at the offset in the raw string. Returns the utxo_input and the offset where it
+        ends, or (None, offset) on a type/version error. The decode methods below all follow this pattern, so a raw
+        block is decoded in one pass over a single string without copying its remainder.
+        '''
         # Type version
-        if not self.verify_type_version(self.F.UTXO_INPUT_TYPE, self.F.VERSION, raw_utxo):
+        if not self.verify_type_version(self.F.UTXO_INPUT_TYPE, self.F.VERSION, raw, offset):
             # Logging
             self.logger.error('Type/Version error in raw utxo_input')
-            return None
+            return None, offset
 
         # tx_id, tx_index, signature
-        index0 = self.v_index
+        index0 = offset + self.v_index
         index1 = index0 + self.F.HASH_CHARS
         index2 = index1 + self.F.INDEX_CHARS
         index3 = index2 + self.F.SIGNATURE_CHARS
 
-        tx_id = raw_utxo[index0:index1]
-        tx_index = int(raw_utxo[index1:index2], 16)
-        signature = raw_utxo[index2:index3]
+        tx_id = raw[index0:index1]
+        tx_index = int(raw[index1:index2], 16)
+        signature = raw[index2:index3]
 
-        return UTXO_INPUT(tx_id, tx_index, signature)
+        return UTXO_INPUT(tx_id, tx_index, signature), index3
 
     def raw_utxo_output(self, raw_utxo: str):
+        utxo_output, _ = self.read_utxo_output(raw_utxo, 0)
+        return utxo_output
+
+    def read_utxo_output(self, raw: str, offset: int):
         # Type version
-        if not self.verify_type_version(self.F.UTXO_OUTPUT_TYPE, self.F.VERSION, raw_utxo):
+        if not self.verify_type_version(self.F.UTXO_OUTPUT_TYPE, self.F.VERSION, raw, offset):
             # Logging
             self.logger.error('Type/Version error in raw utxo_output')
-            return None
+            return None, offset
 
-        # tx_id, tx_index, signature
-        index0 = self.v_index
+        # amount, address, block_height
+        index0 = offset + self.v_index
         index1 = index0 + self.F.AMOUNT_CHARS
         index2 = index1 + self.F.ADDRESS_CHARS
         index3 = index2 + self.F.HEIGHT_CHARS
 
-        amount = int(raw_utxo[index0:index1], 16)
-        address = self.F.int_to_base58(int(raw_utxo[index1:index2], 16))
-        block_height = int(raw_utxo[index2:index3], 16)
+        amount = int(raw[index0:index1], 16)
+        hex_address = raw[index1:index2]
+        address_num = int(hex_address, 16)
+        address = self.F.int_to_base58(address_num)
+        block_height = int(raw[index2:index3], 16)
+
+        # The hex address is saved with the output only if it's the same as formatting the address would give
+        if hex(address_num)[2:] != hex_address:
+            hex_address = None
 
-        return UTXO_OUTPUT(amount, address, block_height)
+        return UTXO_OUTPUT(amount, address, block_height, hex_address), index3
 
     # Transaction
     def raw_transaction(self, raw_tx: str):
+        transaction, _ = self.read_transaction(raw_tx, 0)
+        return transaction
+
+    def read_transaction(self, raw: str, offset: int):
         # Type version
-        if not self.verify_type_version(self.F.TX_TYPE, self.F.VERSION, raw_tx):
+        if not self.verify_type_version(self.F.TX_TYPE, self.F.VERSION, raw, offset):
             # Logging
             self.logger.error('Type/Version error in raw transaction')
-            return None
+            return None, offset
 
-        temp_index = self.v_index + self.F.COUNT_CHARS
+        temp_index = offset + self.v_index + self.F.COUNT_CHARS
 
         # Get inputs
-        input_count = int(raw_tx[self.v_index:temp_index], 16)
+        input_count = int(raw[offset + self.v_index:temp_index], 16)
         inputs = []
         for x in range(input_count):
-            utxo_input = self.raw_utxo_input(raw_tx[temp_index:])
+            utxo_input, temp_index = self.read_utxo_input(raw, temp_index)
+            if utxo_input is None:
+                return None, offset
             inputs.append(utxo_input)
-            temp_index += len(utxo_input.raw_utxo)
 
         # Get outputs
-        output_count = int(raw_tx[temp_index:temp_index + self.F.COUNT_CHARS], 16)
+        output_count = int(raw[temp_index:temp_index + self.F.COUNT_CHARS], 16)
         outputs = []
         temp_index += self.F.COUNT_CHARS
         for y in range(output_count):
-            utxo_output = self.raw_utxo_output(raw_tx[temp_index:])
+            utxo_output, temp_index = self.read_utxo_output(raw, temp_index)
+            if utxo_output is None:
+                return None, offset
             outputs.append(utxo_output)
-            temp_index += len(utxo_output.raw_utxo)
 
         # Return Transaction
-        return Transaction(inputs, outputs)
+        return Transaction(inputs, outputs), temp_index
 
     def raw_mining_transaction(self, raw_tx: str):
+        mining_tx, _ = self.read_mining_transaction(raw_tx, 0)
+        return mining_tx
+
+    def read_mining_transaction(self, raw: str, offset: int):
         # Type version
-        if not self.verify_type_version(self.F.MINING_TX_TYPE, self.F.VERSION, raw_tx):
+        if not self.verify_type_version(self.F.MINING_TX_TYPE, self.F.VERSION, raw, offset):
             # Logging
             self.logger.error('Type/Version error in raw mininig transaction')
-            return None
+            return None, offset
 
         # Indexing
-        index0 = self.v_index
+        index0 = offset + self.v_index
         index1 = index0 + self.F.HEIGHT_CHARS
         index2 = index1 + self.F.REWARD_CHARS
         index3 = index2 + self.F.AMOUNT_CHARS
 
         # Values
-        height = int(raw_tx[index0:index1], 16)
-        reward = int(raw_tx[index1:index2], 16)
-        block_fees = int(raw_tx[index2:index3], 16)
+        height = int(raw[index0:index1], 16)
+        reward = int(raw[index1:index2], 16)
+        block_fees = int(raw[index2:index3], 16)
 
         # Mining UTXO
-        mining_utxo = self.raw_utxo_output(raw_tx[index3:])
-        try:
-            address = mining_utxo.address
-            return MiningTransaction(height, reward, block_fees, address, mining_utxo.block_height)
-        except AttributeError:
+        mining_utxo, end_index = self.read_utxo_output(raw, index3)
+        if mining_utxo is None:
             # Logging
-            self.logger.error(f'Mining utxo failed to return raw_utxo_output from {raw_tx[index3:]}')
+            self.logger.error(f'Mining utxo failed to return raw_utxo_output at index {index3}')
+            return None, offset
 
-        return None
+        return MiningTransaction(height, reward, block_fees, mining_utxo.address, mining_utxo.block_height,
+                                 mining_utxo.hex_address), end_index
 
     def transaction_from_dict(self, tx_dict: dict):
         input_count = tx_dict['input_count']
@@ -265,8 +292,12 @@ class Decoder:
             return None
 
         # Headers
-        header = self.raw_block_header(raw_block[self.v_index:self.v_index + self.F.HEADER_CHARS])
-        mining_tx, transactions = self.raw_block_transactions(raw_block[self.v_index + self.F.HEADER_CHARS:])
+        header, header_index = self.read_block_header(raw_block, self.v_index)
+        if header is None:
+            return None
+        mining_tx, transactions, _ = self.read_block_transactions(raw_block, header_index)
+        if mining_tx is None:
+            return None
 
         # Get block and verify merkle root
         block = Block(header.prev_id, header.target, header.nonce, header.timestamp, mining_tx, transactions)
@@ -277,14 +308,18 @@ class Decoder:
         return block
 
     def raw_block_header(self, raw_header: str):
+        header, _ = self.read_block_header(raw_header, 0)
+        return header
+
+    def read_block_header(self, raw: str, offset: int):
         # Type version
-        if not self.verify_type_version(self.F.HEADER_TYPE, self.F.VERSION, raw_header):
+        if not self.verify_type_version(self.F.HEADER_TYPE, self.F.VERSION, raw, offset):
             # Logging
             self.logger.error('Type/Version error in raw block headers')
-            return None
+            return None, offset
 
         # Indexing
-        index0 = self.v_index
+        index0 = offset + self.v_index
         index1 = index0 + self.F.HASH_CHARS
         index2 = index1 + self.F.HASH_CHARS
         index3 = index2 + self.F.TARGET_CHARS
@@ -292,37 +327,48 @@ class Decoder:
         index5 = index4 + self.F.TIMESTAMP_CHARS
 
         # Recover values
-        prev_id = raw_header[index0:index1]
-        merkle_root = raw_header[index1:index2]
-        target = self.F.int_from_target(raw_header[index2:index3])
-        nonce = int(raw_header[index3:index4], 16)
-        timestamp = int(raw_header[index4:index5], 16)
+        prev_id = raw[index0:index1]
+        merkle_root = raw[index1:index2]
+        target = self.F.int_from_target(raw[index2:index3])
+        nonce = int(raw[index3:index4], 16)
+        timestamp = int(raw[index4:index5], 16)
 
         # Return header
-        return Header(prev_id, merkle_root, target, nonce, timestamp)
+        return Header(prev_id, merkle_root, target, nonce, timestamp), index5
 
     def raw_block_transactions(self, raw_txs: str):
+        mining_tx, transactions, _ = self.read_block_transactions(raw_txs, 0)
+        if mining_tx is None:
+            return None
+        return mining_tx, transactions
+
+    def read_block_transactions(self, raw: str, offset: int):
+        '''
+        Returns the mining_tx, the list of transactions and the end offset, or (None, None, offset) on error
+        '''
         # Type version
-        if not self.verify_type_version(self.F.BLOCK_TX_TYPE, self.F.VERSION, raw_txs):
+        if not self.verify_type_version(self.F.BLOCK_TX_TYPE, self.F.VERSION, raw, offset):
             # Logging
             self.logger.error('Type/Version error in raw block transactions')
-            return None
+            return None, None, offset
 
-            # Get mining_tx
-        mining_tx = self.raw_mining_transaction(raw_txs[self.v_index:])
+        # Get mining_tx
+        mining_tx, mining_index = self.read_mining_transaction(raw, offset + self.v_index)
+        if mining_tx is None:
+            return None, None, offset
 
         # Indexing
-        mining_index = self.v_index + len(mining_tx.raw_tx)
         count_index = self.F.BLOCK_TX_CHARS + mining_index
-        tx_count = int(raw_txs[mining_index: count_index], 16)
+        tx_count = int(raw[mining_index:count_index], 16)
 
         # Get UserTx's
         transactions = []
         temp_index = count_index
         for x in range(0, tx_count):
-            new_tx = self.raw_transaction(raw_txs[temp_index:])
+            new_tx, temp_index = self.read_transaction(raw, temp_index)
+            if new_tx is None:
+                return None, None, offset
             transactions.append(new_tx)
-            temp_index += len(new_tx.raw_tx)
 
-        # Return MiningTx, and UserTx list
-        return mining_tx, transactions
+        # Return MiningTx, UserTx list and end index
+        return mining_tx, transactions, temp_index
@@ -2,9 +2,12 @@
 TESTING
 '''
 from hashlib import sha256, sha1
+from itertools import product
 
 import basicblockchains_ecc.elliptic_curve
 
+from cache import LRUCache
+
 
 class Formatter():
     # TYPE
@@ -45,6 +48,10 @@ class Formatter():
     CHECKSUM_CHARS = 8
     ADDRESS_CHARS = TYPE_CHARS + EPK_CHARS + CHECKSUM_CHARS
 
+    # Cpk -> (point, address) cache shared by every Formatter
+    KEY_CACHE = LRUCache(pow(2, 14))
+    CURVE = basicblockchains_ecc.elliptic_curve.secp256k1()
+
     # UTXO FORMATTING
     # Input
     TX_ID_CHARS = 64
@@ -91,6 +98,12 @@ class Formatter():
     PORT_CHARS = 4
     NODE_CHARS = IP_CHARS + PORT_CHARS
 
+    # BINARY FORMATTING
+    # Raw strings are stored and sent as a format version byte followed by the bytes of their hex digits
+    BINARY_VERSION = 0x01
+    ACCEPTED_BINARY_VERSIONS = [0x01]
+    BINARY_MIMETYPE = 'application/octet-stream'
+
     # LOG FORMATTING
     LOGGING_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
@@ -104,42 +117,84 @@ class Formatter():
         else:
             return format(0, f'0{hex_length}x')
 
+    # --- BINARY ENCODING/DECODING --- #
+
+    def to_binary(self, raw: str) -> bytes:
+        '''
+        Returns the binary form of a raw string. Ids are hashed over the hex string, so only raw strings which round
+        trip exactly (lowercase hex of whole bytes) are encoded and anything else raises a ValueError.
+        '''
+        raw_bytes = bytes.fromhex(raw)
+        if raw_bytes.hex() != raw:
+            raise ValueError('Raw string is not lowercase hex of whole bytes')
+        return bytes([self.BINARY_VERSION]) + raw_bytes
+
+    def from_binary(self, raw_bytes: bytes) -> str:
+        '''
+        Returns the raw string of a binary value. Raises a ValueError for an unknown binary version.
+        '''
+        if not raw_bytes or raw_bytes[0] not in self.ACCEPTED_BINARY_VERSIONS:
+            raise ValueError('Unknown binary version')
+        return raw_bytes[1:].hex()
+
     # --- BASE58 ENCODING/DECODING --- #
     BASE58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
     BASE58_LIST = [x for x in BASE58_ALPHABET]
 
+    # Lookup tables for the value of each symbol when decoding, and the symbols of each pair of digits, so numbers are
+    # encoded two digits at a time
+    BASE58_INDEX = {symbol: x for (x, symbol) in enumerate(BASE58_ALPHABET)}
+    BASE58_PAIRS = [a + b for (a, b) in product(BASE58_ALPHABET, repeat=2)]
+    BASE58_PAIR_BASE = pow(58, 2)
+
     def int_to_base58(self, num: int) -> str:
         '''
-        We create the string by successively dividing by 58 and appending the corresponding symbol to our string.
+        We create the string by successively dividing by 58^2 and joining the symbols of each pair of residues.
         '''
-        # Start with empty string
-        base58_string = ''
-
         # Return empty string if integer is negative
         if num < 0:
-            return base58_string
+            return ''
 
         # Catch zero case
         if num == 0:
-            base58_string = '1'
+            return '1'
 
         # Create string from successive residues
-        else:
-            while num > 0:
-                remainder = num % 58
-                base58_string = self.BASE58_LIST[remainder] + base58_string
-                num = num // 58
-        return base58_string
+        pairs = []
+        while num > 0:
+            num, remainder = divmod(num, self.BASE58_PAIR_BASE)
+            pairs.append(self.BASE58_PAIRS[remainder])
+        base58_string = ''.join(reversed(pairs))
+
+        # Remove the leading zero of the first pair
+        return base58_string[1:] if base58_string[0] == '1' else base58_string
 
     def base58_to_int(self, base58_string: str) -> int:
         '''
-        To convert a base58 string back to an int:
-            -For each character, find the numeric index in the list of alphabet characters
-            -Multiply this numeric value by a corresponding power of 58
-            -Sum all values
+        To convert a base58 string back to an int we look up the value of each symbol in the index table and add it to
+        the running total multiplied by 58. Raises a ValueError for symbols outside the alphabet.
         '''
-        return sum([self.BASE58_LIST.index(base58_string[x:x + 1]) * pow(58, len(base58_string) - x - 1) for x in
-                    range(0, len(base58_string))])
+        num = 0
+        try:
+            for symbol in base58_string:
+                num = num * 58 + self.BASE58_INDEX[symbol]
+        except KeyError:
+            raise ValueError(f'{base58_string} is not a base58 string')
+        return num
+
+    def hex_addresses(self, addresses: list) -> list:
+        '''
+        Returns the hex address of each address in the list. Each distinct address is decoded once.
+        '''
+        hex_dict = {address: self.hex_address(address) for address in set(addresses)}
+        return [hex_dict[address] for address in addresses]
+
+    def base58_addresses(self, hex_addresses: list) -> list:
+        '''
+        Returns the base58 address of each hex address in the list. Each distinct hex address is encoded once.
+        '''
+        address_dict = {hex_address: self.int_to_base58(int(hex_address, 16)) for hex_address in set(hex_addresses)}
+        return [address_dict[hex_address] for hex_address in hex_addresses]
 
     # CPk, Address, Signature
 
@@ -167,6 +222,22 @@ class Formatter():
         # Address = type + epk + checksum (26 byte address)
         return self.int_to_base58(int(type + epk + checksum, 16))
 
+    def cpk_key(self, cpk: str) -> tuple:
+        '''
+        Returns the decompressed (point, address) of the cpk from the key cache, computing both on a miss
+        '''
+        key = self.KEY_CACHE.get(cpk)
+        if key is None:
+            key = (self.CURVE.decompress_point(cpk), self.address(cpk))
+            self.KEY_CACHE.put(cpk, key)
+        return key
+
+    def cpk_point(self, cpk: str):
+        return self.cpk_key(cpk)[0]
+
+    def cpk_address(self, cpk: str) -> str:
+        return self.cpk_key(cpk)[1]
+
     def hex_address(self, address: str):
         temp_hex = hex(self.base58_to_int(address))[2:]
         if len(temp_hex) == self.ADDRESS_CHARS:
@@ -236,6 +307,12 @@ class Formatter():
 
         return self.target_from_parts(coeff, exp)
 
+    def work_from_target(self, target: int):
+        '''
+        The expected number of hashes needed to find an id under the target
+        '''
+        return pow(2, 8 * self.HASH_CHARS // 2) // (target + 1)
+
     def adjust_target_up(self, num_target: int, adjust_amount: int):
         # Get target parts
         coefficient, exponent = self.get_target_parts(num_target)
@@ -0,0 +1,37 @@
+'''
+The Frozen class
+'''
+
+
+class Frozen:
+    '''
+    Base class for the immutable data classes. Subclasses declare __slots__ and set their values once in __init__ with
+    set_slot. Values derived from the slots, like the raw string and the id, are saved in their own slots the first
+    time they are computed with memo, so they are never serialised or hashed twice.
+    '''
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is immutable. Cannot set {name}')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{type(self).__name__} is immutable. Cannot delete {name}')
+
+    def __setstate__(self, state):
+        # Slotted objects are copied and pickled as (None, slot_dict)
+        _, slot_state = state
+        for name, value in slot_state.items():
+            object.__setattr__(self, name, value)
+
+    def set_slot(self, name: str, value):
+        object.__setattr__(self, name, value)
+
+    def memo(self, name: str, compute):
+        '''
+        Returns the value saved in the named slot, computing and saving it first if the slot is None
+        '''
+        value = object.__getattribute__(self, name)
+        if value is None:
+            value = compute()
+            object.__setattr__(self, name, value)
+        return value
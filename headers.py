@@ -5,48 +5,82 @@ import json
 from hashlib import sha256
 
 from formatter import Formatter
+from frozen import Frozen
 
 
-class Header:
+class Header(Frozen):
+    '''
+    The Header is immutable except for the mining fields. Setting the nonce or timestamp while mining clears the
+    memoized raw header and id, while the raw prefix is kept.
+    '''
+    __slots__ = ('prev_id', 'merkle_root', 'target', 'nonce', 'timestamp', '_raw_prefix', '_raw_header', '_id')
+
+    # Setup formatter
+    f = Formatter()
+
+    # Fields which can be set after instantiation
+    MINING_FIELDS = ('nonce', 'timestamp')
 
     def __init__(self, prev_id: str, merkle_root: str, target: int, nonce: int, timestamp: int):
-        self.prev_id = prev_id
-        self.target = target
-        self.nonce = nonce
-        self.timestamp = timestamp
-        self.merkle_root = merkle_root
+        self.set_slot('prev_id', prev_id)
+        self.set_slot('target', target)
+        self.set_slot('nonce', nonce)
+        self.set_slot('timestamp', timestamp)
+        self.set_slot('merkle_root', merkle_root)
+
+        # Memoized values
+        self.set_slot('_raw_prefix', None)
+        self.set_slot('_raw_header', None)
+        self.set_slot('_id', None)
 
     def __repr__(self):
         return self.to_json
 
+    def __setattr__(self, name, value):
+        if name not in self.MINING_FIELDS:
+            super().__setattr__(name, value)
+        self.set_slot(name, value)
+        self.set_slot('_raw_header', None)
+        self.set_slot('_id', None)
+
     @property
-    def raw_header(self):
-        # Setup formatter
-        f = Formatter()
+    def raw_prefix(self):
+        '''
+        The part of the raw header preceding the nonce. This is constant while mining.
+        '''
+        return self.memo('_raw_prefix', self.format_raw_prefix)
 
+    def format_raw_prefix(self):
         # Type/version
-        type = format(f.HEADER_TYPE, f'0{f.TYPE_CHARS}x')
-        version = f.VERSION
+        type = format(self.f.HEADER_TYPE, f'0{self.f.TYPE_CHARS}x')
+        version = self.f.VERSION
 
         # Format headers
-        prev_id = f.format_hex(self.prev_id, f.HASH_CHARS)
-        merkle_root = f.format_hex(self.merkle_root, f.HASH_CHARS)
-        target = f.target_from_int(self.target)
-        nonce = format(self.nonce, f'0{f.NONCE_CHARS}x')
-        timestamp = format(self.timestamp, f'0{f.TIMESTAMP_CHARS}x')
+        prev_id = self.f.format_hex(self.prev_id, self.f.HASH_CHARS)
+        merkle_root = self.f.format_hex(self.merkle_root, self.f.HASH_CHARS)
+        target = self.f.target_from_int(self.target)
+
+        # Prefix = type + version + prev_hash + merkle_root + target
+        return type + version + prev_id + merkle_root + target
+
+    @property
+    def raw_header(self):
+        return self.memo('_raw_header', self.format_raw_header)
+
+    def format_raw_header(self):
+        # Format nonce and timestamp
+        nonce = format(self.nonce, f'0{self.f.NONCE_CHARS}x')
+        timestamp = format(self.timestamp, f'0{self.f.TIMESTAMP_CHARS}x')
 
         # Raw = type + version + prev_hash + merkle_root + target + nonce + timestamp
-        return type + version + prev_id + merkle_root + target + nonce + timestamp
+        return self.raw_prefix + nonce + timestamp
 
     @property
     def to_json(self):
-        # Setup formatter
-        f = Formatter()
-
         header_dict = {
             "prev_id": self.prev_id,
             "merkle_root": self.merkle_root,
-            "target": f.target_from_int(self.target),
+            "target": self.f.target_from_int(self.target),
             "nonce": self.nonce,
             "timestamp": self.timestamp
         }
@@ -54,4 +88,4 @@ class Header:
 
     @property
     def id(self):
-        return sha256(self.raw_header.encode()).hexdigest()
+        return self.memo('_id', lambda: sha256(self.raw_header.encode()).hexdigest())
@@ -1,16 +1,380 @@
 '''
 The Miner class
 '''
+import logging
+import os
+import time
+from hashlib import sha256
+from multiprocessing import Array, Process, Queue, Value
+from queue import Empty
+
 from block import Block
+from formatter import Formatter
+from headers import Header
+from transactions import MiningTransaction
+
+# --- CONSTANTS --- #
+F = Formatter()
+NONCE_FORMAT = f'%0{F.NONCE_CHARS}x'.encode()
+
+
+# --- HASHING --- #
+
+def search_prefix(prefix_hash, suffix: bytes, target: int, start_nonce: int, end_nonce: int):
+    '''
+    Returns the first nonce in the range [start_nonce, end_nonce) for which the sha256 of prefix + nonce + suffix is
+    under the target, or None if there is no such nonce. The prefix_hash is a sha256 object which has already been
+    updated with the constant raw header prefix.
+    '''
+    for nonce in range(start_nonce, end_nonce):
+        nonce_hash = prefix_hash.copy()
+        nonce_hash.update(NONCE_FORMAT % nonce + suffix)
+        if int.from_bytes(nonce_hash.digest(), 'big') <= target:
+            return nonce
+    return None
+
+
+def search_nonces(header: Header, start_nonce: int, end_nonce: int):
+    '''
+    Returns the first nonce in the range [start_nonce, end_nonce) for which the header id is under the target, or
+    None if there is no such nonce.
+    The sha256 state of the constant raw header prefix is computed once, so each nonce only hashes the nonce and
+    timestamp bytes. The integer value of the digest agrees with int(header.id, 16).
+    '''
+    prefix_hash = sha256(header.raw_prefix.encode())
+    suffix = format(header.timestamp, f'0{F.TIMESTAMP_CHARS}x').encode()
+    return search_prefix(prefix_hash, suffix, header.target, start_nonce, end_nonce)
+
+
+def roll_extra_nonce(block: Block) -> Block:
+    '''
+    Returns a copy of the Block with the block_height of the mining utxo increased by 1, to get a fresh merkle root
+    once the nonce space is exhausted. Validation only requires the mining utxo block_height to be at least the mining
+    delay past the block height, so the Block stays valid and the reward is delayed by one block.
+    The transactions are shared with the original Block, so their ids aren't computed again.
+    '''
+    mining_tx = block.mining_tx
+    rolled_mining_tx = MiningTransaction(mining_tx.height, mining_tx.reward, mining_tx.block_fees,
+                                         mining_tx.mining_utxo.address, mining_tx.mining_utxo.block_height + 1,
+                                         mining_tx.mining_utxo.hex_address)
+    return Block(block.prev_id, block.target, 0, block.timestamp, rolled_mining_tx, block.transactions)
 
 
 # --- MINE BLOCK METHOD --- #
 
 def mine_a_block(block: Block, queue=None):
-    while int(block.id, 16) > block.target:
-        block.header.nonce += 1
+    nonce = search_nonces(block.header, block.header.nonce, pow(16, F.NONCE_CHARS))
+    while nonce is None:
+        # Nonce space exhausted
+        block = roll_extra_nonce(block)
+        nonce = search_nonces(block.header, 0, pow(16, F.NONCE_CHARS))
+    block.header.nonce = nonce
 
     if queue:
         queue.put(block)
     else:
         return block
+
+
+# --- MINING WORKER --- #
+
+def mining_worker(job_queue, result_queue, epoch, hash_counts, worker_index, check_interval=0x1000):
+    '''
+    Long-lived mining process. Each job in the job_queue is a block template of the form
+        (job_epoch, raw_prefix, timestamp, max_timestamp, target, start_nonce, end_nonce)
+    The worker searches the nonce range until it finds a nonce or the shared epoch moves past job_epoch, which is
+    checked every check_interval nonces. Found nonces are put in the result_queue as (job_epoch, nonce, timestamp).
+    When the nonce range is exhausted the timestamp is rolled forward by 1 second, up to max_timestamp, and the range
+    is searched again. Nonce ranges are disjoint between workers, so no two workers hash the same header. Once the
+    timestamps are exhausted the worker puts (job_epoch, None, None) in the result_queue.
+    The number of nonces tried is added to hash_counts[worker_index] after every check_interval.
+    A None job shuts the worker down.
+    '''
+    while True:
+        job = job_queue.get()
+        if job is None:
+            return
+        job_epoch, raw_prefix, timestamp, max_timestamp, target, start_nonce, end_nonce = job
+
+        # Hash constant prefix once per template
+        prefix_hash = sha256(raw_prefix)
+        suffix = format(timestamp, f'0{F.TIMESTAMP_CHARS}x').encode()
+
+        nonce = start_nonce
+        while epoch.value == job_epoch:
+            # Roll timestamp when nonce range is exhausted
+            if nonce >= end_nonce:
+                if timestamp >= max_timestamp:
+                    result_queue.put((job_epoch, None, None))
+                    break
+                timestamp += 1
+                suffix = format(timestamp, f'0{F.TIMESTAMP_CHARS}x').encode()
+                nonce = start_nonce
+
+            stop_nonce = min(nonce + check_interval, end_nonce)
+            found_nonce = search_prefix(prefix_hash, suffix, target, nonce, stop_nonce)
+            if found_nonce is not None:
+                hash_counts[worker_index] += found_nonce - nonce + 1
+                result_queue.put((job_epoch, found_nonce, timestamp))
+                break
+            hash_counts[worker_index] += stop_nonce - nonce
+            nonce = stop_nonce
+
+
+class Miner:
+    '''
+    The Miner keeps a pool of long-lived worker processes and splits the nonce space of a block template across them.
+    Templates are sent to each worker through its own job queue as the raw header prefix, timestamp, target and nonce
+    range. A shared epoch counter in shared memory tags the current template; incrementing it cancels the template and
+    workers move on to the next job in their queue.
+    '''
+    # Formatter
+    f = Formatter()
+
+    # Timeout for checking queue
+    MINER_TIMEOUT = 1
+
+    def __init__(self, workers=None, logger=None):
+        # Logging
+        if logger:
+            self.logger = logger.getChild('Miner')
+        else:
+            self.logger = logging.getLogger('Miner')
+            self.logger.setLevel('DEBUG')
+            self.logger.addHandler(logging.StreamHandler())
+
+        # Number of worker processes
+        self.workers = workers if workers else os.cpu_count() or 1
+
+        # Shared epoch for cancellation
+        self.epoch = Value('Q', 0)
+
+        # Shared nonce count for each worker - each worker only writes its own index
+        self.hash_counts = Array('Q', self.workers, lock=False)
+
+        # Queues for templates and found nonces
+        self.job_queues = []
+        self.result_queue = Queue()
+
+        # Worker processes - started on first template
+        self.processes = []
+
+        # Nonce space split across workers
+        self.nonce_space = pow(16, self.f.NONCE_CHARS)
+
+        # Mining flag for current template
+        self.is_mining = False
+
+        # Telemetry
+        self.templates = 0
+        self.stale_templates = 0
+        self.extra_nonces = 0
+        self.blocks_mined = 0
+        self.last_time_to_block = None
+        self.total_time_to_block = 0
+        self.template_start_time = 0
+        self.template_end_time = 0
+        self.template_start_counts = [0] * self.workers
+        self.template_end_counts = [0] * self.workers
+
+    @property
+    def is_running(self):
+        return self.processes != [] and all(p.is_alive() for p in self.processes)
+
+    # --- TELEMETRY --- #
+    @property
+    def template_time(self):
+        '''
+        Seconds spent on the current template, or on the last template if not mining
+        '''
+        end_time = time.time() if self.is_mining else self.template_end_time
+        return end_time - self.template_start_time
+
+    @property
+    def worker_nonces(self):
+        '''
+        Nonces tried by each worker on the current template, or on the last template if not mining
+        '''
+        end_counts = list(self.hash_counts) if self.is_mining else self.template_end_counts
+        return [end - start for (start, end) in zip(self.template_start_counts, end_counts)]
+
+    @property
+    def template_nonces(self):
+        return sum(self.worker_nonces)
+
+    @property
+    def worker_hashrates(self):
+        '''
+        Hashes per second for each worker over the current or last template
+        '''
+        elapsed_time = self.template_time
+        if elapsed_time <= 0:
+            return [0] * self.workers
+        return [int(nonces / elapsed_time) for nonces in self.worker_nonces]
+
+    @property
+    def hashrate(self):
+        return sum(self.worker_hashrates)
+
+    @property
+    def average_time_to_block(self):
+        if self.blocks_mined == 0:
+            return None
+        return self.total_time_to_block / self.blocks_mined
+
+    @property
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "is_mining": self.is_mining,
+            "hashrate": self.hashrate,
+            "worker_hashrates": self.worker_hashrates,
+            "template_nonces": self.template_nonces,
+            "template_time": self.template_time,
+            "total_nonces": sum(self.hash_counts),
+            "templates": self.templates,
+            "blocks_mined": self.blocks_mined,
+            "stale_templates": self.stale_templates,
+            "extra_nonces": self.extra_nonces,
+            "last_time_to_block": self.last_time_to_block,
+            "average_time_to_block": self.average_time_to_block
+        }
+
+    def nonce_ranges(self):
+        '''
+        Returns a list of (start, end) tuples which partition the nonce space across the workers
+        '''
+        chunk = self.nonce_space // self.workers
+        ranges = [(x * chunk, (x + 1) * chunk) for x in range(self.workers)]
+        ranges[-1] = (ranges[-1][0], self.nonce_space)
+        return ranges
+
+    def start(self):
+        '''
+        Start the worker processes if they aren't already running. Dead workers are ended without changing the epoch, so
+        an epoch taken before starting stays current.
+        '''
+        if self.is_running:
+            return
+        self.end_workers()
+        self.job_queues = [Queue() for _ in range(self.workers)]
+        self.processes = [
+            Process(target=mining_worker, args=(job_queue, self.result_queue, self.epoch, self.hash_counts, x),
+                    daemon=True)
+            for x, job_queue in enumerate(self.job_queues)
+        ]
+        for p in self.processes:
+            p.start()
+
+        # Logging
+        self.logger.debug(f'Started {self.workers} mining workers')
+
+    def next_epoch(self) -> int:
+        with self.epoch.get_lock():
+            self.epoch.value += 1
+            return self.epoch.value
+
+    def send_template(self, block: Block, epoch: int, max_timestamp: int):
+        raw_prefix = block.header.raw_prefix.encode()
+        for job_queue, (start_nonce, end_nonce) in zip(self.job_queues, self.nonce_ranges()):
+            job_queue.put((epoch, raw_prefix, block.timestamp, max_timestamp, block.target, start_nonce, end_nonce))
+
+    def mine(self, block: Block, epoch=None, max_timestamp=None):
+        '''
+        Send the Block template to the workers and wait for a nonce. Returns the mined Block or None if the template
+        was cancelled.
+        The epoch can be taken with next_epoch before the template is built, so that a refresh while building the
+        template cancels it.
+        Workers roll the timestamp up to max_timestamp when their nonce range is exhausted. If every worker exhausts its
+        timestamps, we roll the extra nonce in the mining tx and send the new template.
+        '''
+        self.start()
+        if epoch is None:
+            epoch = self.next_epoch()
+        if max_timestamp is None:
+            max_timestamp = block.timestamp
+
+        # Telemetry
+        self.templates += 1
+        self.template_start_time = time.time()
+        self.template_start_counts = list(self.hash_counts)
+        self.is_mining = True
+
+        # Send template to workers
+        if self.epoch.value == epoch:
+            self.send_template(block, epoch, max_timestamp)
+
+        # Wait for nonce or cancellation
+        mined_nonce = None
+        mined_timestamp = None
+        exhausted_workers = 0
+        while mined_nonce is None and self.epoch.value == epoch:
+            try:
+                result_epoch, nonce, timestamp = self.result_queue.get(timeout=self.MINER_TIMEOUT)
+            except Empty:
+                continue
+            # Ignore nonces from cancelled templates
+            if result_epoch != epoch:
+                continue
+            if nonce is not None:
+                mined_nonce = nonce
+                mined_timestamp = timestamp
+            else:
+                exhausted_workers += 1
+                if exhausted_workers == self.workers:
+                    # Logging
+                    self.logger.debug('Nonce space and timestamps exhausted. Rolling extra nonce.')
+                    exhausted_workers = 0
+                    self.extra_nonces += 1
+                    block = roll_extra_nonce(block)
+                    self.send_template(block, epoch, max_timestamp)
+
+        # Cancel remaining workers
+        if self.epoch.value == epoch:
+            self.next_epoch()
+
+        # Telemetry
+        self.template_end_time = time.time()
+        self.template_end_counts = list(self.hash_counts)
+        self.is_mining = False
+
+        if mined_nonce is None:
+            self.stale_templates += 1
+            return None
+
+        self.blocks_mined += 1
+        self.last_time_to_block = self.template_end_time - self.template_start_time
+        self.total_time_to_block += self.last_time_to_block
+        block.header.nonce = mined_nonce
+        block.header.timestamp = mined_timestamp
+        return block
+
+    def stop(self):
+        '''
+        Cancel the current template. Workers remain running and wait for the next template, so this is also used to
+        refresh the template in place.
+        '''
+        self.next_epoch()
+        # Wake up the waiting miner
+        self.result_queue.put((None, None, None))
+
+    def shutdown(self):
+        '''
+        Cancel the current template and end the worker processes
+        '''
+        self.stop()
+        self.end_workers()
+
+    def end_workers(self):
+        '''
+        End the worker processes, terminating any which don't exit
+        '''
+        for job_queue in self.job_queues:
+            job_queue.put(None)
+        for p in self.processes:
+            p.join(self.MINER_TIMEOUT)
+            if p.is_alive():
+                p.terminate()
+                p.join()
+        self.processes = []
+        self.job_queues = []
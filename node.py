@@ -9,16 +9,16 @@ import random
 import secrets
 import socket
 import threading
-from multiprocessing import Process, Queue
 
 import requests
 from requests import get
 
 from block import Block
+from block_view import BlockView
 from blockchain import Blockchain
 from decoder import Decoder
 from formatter import Formatter
-from miner import mine_a_block
+from miner import Miner
 from timestamp import utc_to_seconds
 from transactions import Transaction, MiningTransaction
 from wallet import Wallet
@@ -35,7 +35,6 @@ class Node:
     f = Formatter()
 
     # Timeout for running processes
-    MINER_TIMEOUT = 1
     SERVER_TIMEOUT = 10
 
     # Port data for flask sever
@@ -46,9 +45,11 @@ class Node:
 
     # Constants for requests
     request_header = {'Content-type': 'application/json', 'Accept': 'text/plain'}
+    binary_request_header = {'Content-type': Formatter.BINARY_MIMETYPE,
+                             'Accept': f'{Formatter.BINARY_MIMETYPE}, application/json;q=0.9'}
 
     def __init__(self, dir_path=DIR_PATH, db_file=DB_FILE, wallet_file=WALLET_FILE, port=DEFAULT_PORT, seed=None,
-                 logger=None, local=False):
+                 logger=None, local=False, mining_workers=None):
         # Loggging
         if logger:
             self.logger = logger.getChild('Node')
@@ -72,12 +73,15 @@ class Node:
         # Create Blockchain object
         self.blockchain = Blockchain(self.dir_path, self.db_file, logger=self.logger)
 
-        # Create Block queue for miner
-        self.block_queue = Queue()
+        # Create Miner - splits nonce space over mining_workers processes (defaults to cpu count)
+        self.miner = Miner(workers=mining_workers, logger=self.logger)
 
         # Create mining flag for monitoring
         self.is_mining = False
 
+        # Lock for changes to the chain and mining template - blocks can arrive while the miner is running
+        self.block_lock = threading.RLock()
+
         # Create Wallet object
         self.wallet = Wallet(seed, dir_path=self.dir_path, file_name=self.wallet_file, logger=self.logger)
 
@@ -95,6 +99,9 @@ class Node:
         # Create Node list
         self.node_list = []
 
+        # Nodes which have sent raw blocks in the binary format
+        self.binary_nodes = set()
+
         # Create connected flag for network
         self.is_connected = False
 
@@ -123,6 +130,25 @@ class Node:
     def total_mining_amount(self):
         return self.blockchain.total_mining_amount
 
+    @property
+    def chain_work(self):
+        return self.blockchain.chain_work
+
+    @property
+    def hashrate(self):
+        return self.miner.hashrate
+
+    @property
+    def mining_stats(self):
+        return self.miner.stats
+
+    @property
+    def cache_stats(self):
+        return {
+            "keys": self.f.KEY_CACHE.stats,
+            "signatures": self.blockchain.verifier.cache.stats
+        }
+
     # --- MINER --- #
     def start_miner(self):
         '''
@@ -149,67 +175,103 @@ class Node:
     def mining_monitor(self):
         self.logger.debug('Mining monitor running')
         while self.is_mining and self.is_connected:
-            unmined_block = self.create_next_block()
+            # Take epoch before building template so a refresh during construction cancels it
+            epoch = self.miner.next_epoch()
+            with self.block_lock:
+                unmined_block = self.create_next_block()
+                max_timestamp = self.last_block.timestamp + pow(self.f.HEARTBEAT, 2)
 
             # Logging
             self.logger.info(f'Mining block at height {unmined_block.height}')
 
-            # Process
-            self.mining_process = Process(target=mine_a_block, args=(unmined_block, self.block_queue))
-            self.mining_process.start()
-
-            # Handle blocking function
-            next_block = None
-            mining = True
-            while mining:
-                try:
-                    next_block = self.block_queue.get(timeout=self.MINER_TIMEOUT)  # Next block is waiting in the thread
-                    mining = False
-                except Exception:
-                    # If not mining, end monitor
-                    if not self.is_mining:
-                        self.logger.debug('Mining interrupt received.')
-                        mining = False
-            if next_block:
+            # Blocks until a worker finds the block or the template is cancelled
+            next_block = self.miner.mine(unmined_block, epoch, max_timestamp)
+            if not self.is_mining:
+                self.logger.debug('Mining interrupt received.')
+            elif next_block:
                 added = self.add_block(next_block)
                 if added:
                     # Logging
                     self.logger.info(f'Successfully mined block at height {next_block.height}')
                     self.gossip_protocol_block(next_block)
+                elif next_block.prev_id == self.last_block.id:
+                    # Tip hasn't moved, so the template is invalid - drop its transactions instead of releasing them
+                    # Logging
+                    self.logger.warning(
+                        f'Block mined but failed validation. Evicting {len(self.block_transactions)} transactions.')
+                    self.evict_block_transactions()
                 else:
                     # Logging
                     self.logger.warning(
                         f'Block mined but failed to be added. Likely fork. Current forks: {self.blockchain.forks}')
+            else:
+                self.logger.debug('Refreshing mining template.')
+
+            # Return unmined block transactions to validated txs
+            self.release_block_transactions()
 
         self.logger.debug('Mining monitor terminated.')
 
     def stop_miner(self):
         if self.is_mining:
-            # Kill mining process
-            if self.mining_process.is_alive():
-                self.mining_process.terminate()
+            # Cancel mining workers
             self.is_mining = False
+            self.miner.stop()
 
             # Logging
             self.logger.debug('Terminating mining functions')
 
+            # Wait until mining thread finishes - workers remain running for the next template
+            self.mining_thread.join()
+
             # Put block transactions back in validated txs
+            self.release_block_transactions()
+
+    def refresh_miner(self):
+        '''
+        Cancel the current mining template. The mining monitor builds a new template from the current chain and
+        validated transactions, and sends it to the same mining workers.
+        '''
+        if self.is_mining:
+            self.miner.stop()
+
+    def release_block_transactions(self):
+        '''
+        Return the transactions in an unmined template to the front of the validated transactions. These have already
+        been validated, so we only drop those which are now in the chain or whose inputs have been consumed.
+        '''
+        with self.block_lock:
             block_tx_index = self.block_transactions.copy()
             self.block_transactions = []
+            released_txs = []
             for tx in block_tx_index:
                 in_chain = tx.id in self.last_block.tx_ids
-                if not in_chain:
-                    # Add back consumed utxos
+                inputs_available = all(
+                    self.blockchain.chain_db.get_utxo(i.tx_id, i.index) for i in tx.inputs
+                )
+                if not in_chain and inputs_available:
+                    released_txs.append(tx)
+                else:
+                    # Remove consumed utxos
                     for input in tx.inputs:
                         input_tuple = (input.tx_id, input.index)
                         if input_tuple in self.consumed_utxos:
                             self.consumed_utxos.remove(input_tuple)
-                    # Revalidate tx
-                    self.add_transaction(tx)
+            self.validated_transactions[0:0] = released_txs
 
-            # Wait until mining thread dies
-            while self.mining_thread.is_alive():
-                pass
+    def evict_block_transactions(self):
+        '''
+        Drop the transactions in a template whose mined Block failed validation, so they aren't put back in the
+        validated transactions for the next template.
+        '''
+        with self.block_lock:
+            for tx in self.block_transactions:
+                # Remove consumed utxos
+                for input in tx.inputs:
+                    input_tuple = (input.tx_id, input.index)
+                    if input_tuple in self.consumed_utxos:
+                        self.consumed_utxos.remove(input_tuple)
+            self.block_transactions = []
 
     def create_next_block(self):
         # Get as many validated transactions that will fit in the Block
@@ -226,10 +288,10 @@ class Node:
 
         # Create Mining Transaction
         mining_tx = MiningTransaction(self.height + 1, self.mining_reward, block_fees, self.wallet.address,
-                                      self.height + 1 + self.f.MINING_DELAY)
+                                      self.height + 1 + self.f.MINING_DELAY, self.wallet.hex_address)
 
         # Disaster recovery timestamp
-        timestamp = utc_to_seconds()
+        timestamp = max(utc_to_seconds(), self.last_block.timestamp + 1)  # Timestamp must increase
         if timestamp > self.last_block.timestamp + pow(self.f.HEARTBEAT, 2):
             timestamp = self.last_block.timestamp + pow(self.f.HEARTBEAT, 2) - 1
 
@@ -269,37 +331,46 @@ class Node:
 
     # --- ADD BLOCK --- #
     def add_block(self, block: Block, catching_up=False) -> bool:
-        added = self.blockchain.add_block(block)
-        if added:
-            # Logging
-            self.logger.info(f'Added block at height {block.height}')
-
-            # Remove validated transactions
-            validated_tx_index = self.validated_transactions.copy()
-            for tx in validated_tx_index:
-                if tx.id in self.last_block.tx_ids:
-                    self.validated_transactions.remove(tx)
-                    # Remove consumed utxos
-                    for input in tx.inputs:
-                        input_tuple = (input.tx_id, input.index)
-                        if input_tuple in self.consumed_utxos:
-                            self.consumed_utxos.remove(input_tuple)
-
-            # Check orphans if not catching up
-            if not catching_up:
-                # Check if orphaned transactions are now valid
-                self.check_for_tx_parents()
-
-                # Check if orphaned blocks are now valid
-                self.check_for_block_parents()
-        elif block.height > self.height:
-            self.orphaned_blocks.append(block)
+        with self.block_lock:
+            added = self.blockchain.add_block(block)
+            if added:
+                # Logging
+                self.logger.info(f'Added block at height {block.height}')
+
+                # Remove validated transactions - a fork can add more than one block
+                validated_tx_index = self.validated_transactions.copy()
+                for tx in validated_tx_index:
+                    if self.blockchain.chain_db.get_tx_location(tx.id):
+                        self.validated_transactions.remove(tx)
+                        # Remove consumed utxos
+                        for input in tx.inputs:
+                            input_tuple = (input.tx_id, input.index)
+                            if input_tuple in self.consumed_utxos:
+                                self.consumed_utxos.remove(input_tuple)
+
+                # Check orphans if not catching up
+                if not catching_up:
+                    # Check if orphaned transactions are now valid
+                    self.check_for_tx_parents()
+
+                    # Check if orphaned blocks are now valid
+                    self.check_for_block_parents()
+            elif block.height > self.height:
+                self.orphaned_blocks.append(block)
 
         return added
 
     # --- ADD TRANSACTION --- #
 
     def add_transaction(self, transaction: Transaction) -> bool:
+        # Check raw tx is lowercase hex - blocks containing it are saved in the binary format
+        try:
+            self.f.to_binary(transaction.raw_tx)
+        except ValueError:
+            # Logging
+            self.logger.warning('Raw transaction is not lowercase hex.')
+            return False
+
         # Make sure tx is not in chain
         existing_tx = self.blockchain.get_tx_by_id(transaction.id)
         if existing_tx:
@@ -359,13 +430,14 @@ class Node:
 
                 # Validate the address from compressed public key
                 cpk, (r, s) = self.d.decode_signature(i.signature)
-                if not self.f.address(cpk) == address:
+                cpk_address = self.f.cpk_address(cpk)
+                if not cpk_address == address:
                     # Logging
-                    self.logger.error(f'CPK/Address error. Address: {address}, CPK Address: {self.f.address(cpk)}')
+                    self.logger.error(f'CPK/Address error. Address: {address}, CPK Address: {cpk_address}')
                     return False
 
-                # Validate the signature
-                if not self.d.verify_signature(i.signature, tx_id):
+                # Validate the signature - saved in the verifier cache for block validation
+                if not self.blockchain.verifier.verify([(i.signature, tx_id)]):
                     # Logging
                     self.logger.error('Signature error')
                     return False
@@ -683,9 +755,13 @@ class Node:
         if block_index is not None:
             url += str(block_index)
         try:
-            r = requests.get(url, headers=self.request_header)
-            raw_block_dict = r.json()
-            raw_block = raw_block_dict['raw_block']
+            r = requests.get(url, headers=self.binary_request_header)
+            if r.headers.get('Content-Type', '').startswith(self.f.BINARY_MIMETYPE):
+                raw_block = self.f.from_binary(r.content)
+                self.binary_nodes.add(node)
+            else:
+                raw_block_dict = r.json()
+                raw_block = raw_block_dict['raw_block']
         except requests.exceptions.ConnectionError:
             # Logging
             self.logger.error(f'Unable to connect to {node} for raw block')
@@ -760,16 +836,24 @@ class Node:
                 f'Error connecting to {node}.\n Status code: {r.status_code}.\n Response message: {r.content.decode()}.')
             return False
 
+    def post_raw(self, node: tuple, endpoint: str, raw: str):
+        '''
+        Post a raw string to the endpoint, in the binary format if the node has sent us a binary raw block
+        '''
+        url = self.make_url(node, endpoint)
+        if node in self.binary_nodes:
+            return requests.post(url, data=self.f.to_binary(raw), headers=self.binary_request_header)
+        return requests.post(url, data=json.dumps({endpoint: raw}), headers=self.request_header)
+
     def send_raw_block_to_node(self, raw_block: str, node: tuple) -> bool:
         '''
         Posting block at /raw_block/ endpoint of node api
         '''
-        data = {'raw_block': raw_block}
         try:
-            r = requests.post(self.make_url(node, 'raw_block'), data=json.dumps(data), headers=self.request_header)
+            r = self.post_raw(node, 'raw_block', raw_block)
         except requests.exceptions.ConnectionError:
             # Logging
-            self.logger.warning(f'Unable to send raw block at height {self.d.raw_block(raw_block).height} to {node}')
+            self.logger.warning(f'Unable to send raw block at height {BlockView(raw_block).height} to {node}')
             return False
         return r.status_code == 200
 
@@ -777,9 +861,8 @@ class Node:
         '''
         Posting tx at /raw_tx/ endpoint of node api
         '''
-        data = {'raw_tx': raw_tx}
         try:
-            r = requests.post(self.make_url(node, 'raw_tx'), data=json.dumps(data), headers=self.request_header)
+            r = self.post_raw(node, 'raw_tx', raw_tx)
         except requests.exceptions.ConnectionError:
             # Logging
             self.logger.warning(f'Unable to send raw tx with id {self.d.raw_transaction(raw_tx).id} to {node}')
@@ -791,8 +874,10 @@ class Node:
         # Stop all mining
         if self.is_mining:
             self.stop_miner()
-            while self.mining_thread.is_alive():
-                pass
+
+        # End mining and verification workers
+        self.miner.shutdown()
+        self.blockchain.verifier.shutdown()
 
         # No longer connected - will be used to confirm delete
         self.is_connected = False
@@ -5,14 +5,18 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from api import create_app, run_app
 from block import Block, calc_merkle_root, merkle_proof
+from block_view import BlockView
+from cache import LRUCache
 from blockchain import Blockchain
 from database import DataBase
 from decoder import Decoder
 from formatter import Formatter
 from headers import Header
-from miner import mine_a_block
+from miner import mine_a_block, Miner, search_nonces
 from node import Node
 from timestamp import utc_timestamp, seconds_to_utc, utc_to_seconds
 from transactions import MiningTransaction, Transaction
 from utxo import UTXO_INPUT, UTXO_OUTPUT
+from verifier import Verifier, verify_signatures
 from wallet import Wallet
+from work_server import WorkServer, WorkClient
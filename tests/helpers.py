@@ -245,5 +245,6 @@ def create_blockchain_gb(blockchain: Blockchain):
     blockchain.chain_db.create_db()
     blockchain.chain = []
     blockchain.height = -1
+    blockchain.chain_work = 0
     blockchain.add_block(gb)
     return blockchain
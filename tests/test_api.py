@@ -103,9 +103,44 @@ def test_endpoints():
     # Verify block
     assert node2.last_block.id == mined_block.id
 
+    # Get mining telemetry
+    test_app = create_app(node1)
+    mining_dict = test_app.test_client().get('/mining/').get_json()
+    assert mining_dict['workers'] == node1.miner.workers
+    assert mining_dict['blocks_mined'] == 0
+    assert not mining_dict['is_mining']
+
+    # Get cache telemetry
+    caches_dict = test_app.test_client().get('/caches/').get_json()
+    assert caches_dict['keys']['maxsize'] == f.KEY_CACHE.maxsize
+    assert caches_dict['signatures']['size'] == len(node1.blockchain.verifier.cache)
+
+    # Get chain state
+    chain_state_dict = test_app.test_client().get('/chain_state/').get_json()
+    assert chain_state_dict['height'] == node1.height
+    assert chain_state_dict['block_id'] == node1.last_block.id
+    assert chain_state_dict['consistent_with_db']
+    assert chain_state_dict['chain_work'] == node1.chain_work
+    assert test_app.test_client().get('/height/').get_json()['chain_work'] == node1.chain_work
+
     # Assert get indexed raw block
     assert node2.get_raw_block_from_node(node1.node, 0) == node2.blockchain.chain[0].raw_block
     assert node1.get_raw_block_from_node(node2.node) == node1.blockchain.chain[1].raw_block
+    assert node2.node in node1.binary_nodes
+
+    # Raw blocks in binary format when accepted, json otherwise
+    binary_response = test_app.test_client().get('/raw_block/0', headers={'Accept': f.BINARY_MIMETYPE})
+    assert binary_response.mimetype == f.BINARY_MIMETYPE
+    assert f.from_binary(binary_response.data) == node1.blockchain.chain[0].raw_block
+    json_response = test_app.test_client().get('/raw_block/', headers={'Accept': 'text/plain'})
+    assert json_response.get_json()['raw_block'] == node1.last_block.raw_block
+
+    # Binary raw block posted at top of chain
+    post_response = test_app.test_client().post('/raw_block/', data=f.to_binary(node1.last_block.raw_block),
+                                                 headers={'Content-Type': f.BINARY_MIMETYPE})
+    assert post_response.status_code == 202
+    post_response = test_app.test_client().post('/raw_block/', data=b'\xff', headers={'Content-Type': f.BINARY_MIMETYPE})
+    assert post_response.status_code == 400
 
     # Create new transaction
     last_block = node1.last_block
@@ -5,7 +5,9 @@ import secrets
 import json
 from hashlib import sha256
 
-from .context import Block, calc_merkle_root, merkle_proof, utc_to_seconds, Decoder
+import pytest
+
+from .context import Block, BlockView, calc_merkle_root, merkle_proof, utc_to_seconds, Decoder
 from .helpers import random_hash, random_target, random_tx, random_mining_tx
 
 
@@ -113,3 +115,81 @@ def test_block():
     assert header.nonce == nonce
     assert header.target == target
     assert header.timestamp == timestamp
+
+
+def test_immutable_block():
+    '''
+    Blocks and their transactions can't be changed after instantiation, except for the header nonce and timestamp
+    '''
+    mining_tx = random_mining_tx()
+    transactions = [random_tx() for _ in range(2)]
+    block = Block(random_hash(), random_target(), 0, utc_to_seconds(), mining_tx, transactions)
+
+    # Transactions saved as tuple
+    transactions.append(random_tx())
+    assert len(block.transactions) == 2
+
+    # Values can't be set
+    for obj, name in [(block, 'transactions'), (block, 'header'), (mining_tx, 'reward'),
+                      (mining_tx.mining_utxo, 'block_height'), (block.transactions[0], 'inputs'),
+                      (block.header, 'merkle_root')]:
+        with pytest.raises(AttributeError):
+            setattr(obj, name, None)
+
+    # Memoized values are the same objects
+    assert block.raw_transactions is block.raw_transactions
+    assert mining_tx.id is mining_tx.id
+    assert block.raw_block is block.raw_block
+
+    # Tx ids list can be extended without changing the block
+    tx_ids = block.tx_ids
+    tx_ids.append(random_hash())
+    assert block.tx_ids == tx_ids[:-1]
+
+    # Nonce and timestamp clear memoized header values
+    raw_prefix = block.header.raw_prefix
+    block_id = block.id
+    raw_block = block.raw_block
+    block.header.nonce = 1
+    assert block.id != block_id
+    assert block.id == sha256(block.raw_header.encode()).hexdigest()
+    assert block.raw_block != raw_block
+    assert block.raw_block == Decoder().raw_block(block.raw_block).raw_block
+    block.header.timestamp += 1
+    assert block.header.raw_prefix is raw_prefix
+    assert Decoder().raw_block(block.raw_block).timestamp == block.timestamp
+
+
+def test_block_view():
+    '''
+    The BlockView agrees with the Block and only decodes the transactions when they're accessed
+    '''
+    transactions = [random_tx() for _ in range(secrets.randbits(3) + 1)]
+    block = Block(random_hash(), random_target(), secrets.randbits(64), utc_to_seconds(), random_mining_tx(),
+                  transactions)
+    view = BlockView(block.raw_block)
+
+    # Header values and tx ids are read without decoding transactions
+    assert view.id == block.id
+    assert view.id is view.id
+    assert view.height == block.height
+    assert view.tx_ids == block.tx_ids
+    assert view.raw_header == block.raw_header
+    assert view.raw_transactions == block.raw_transactions
+    assert (view.prev_id, view.merkle_root, view.target, view.nonce, view.timestamp) == \
+           (block.prev_id, block.merkle_root, block.target, block.nonce, block.timestamp)
+    assert view._mining_tx is None and view._transactions is None
+
+    # Single tx decoded by position
+    for position in range(len(block.tx_ids)):
+        assert view.transaction(position).raw_tx == block.transaction(position).raw_tx
+    assert view._transactions is None
+
+    # Transactions decoded when accessed
+    assert [tx.id for tx in view.transactions] == [tx.id for tx in block.transactions]
+    assert view.mining_tx.raw_tx == block.mining_tx.raw_tx
+    assert view.to_json == block.to_json
+
+    # View is immutable
+    with pytest.raises(AttributeError):
+        view.raw_block = ''
@@ -9,7 +9,8 @@ from pathlib import Path
 
 from .context import Block, Blockchain, DataBase, Decoder, Formatter, MiningTransaction, Transaction, \
     utc_to_seconds, UTXO_INPUT, UTXO_OUTPUT, mine_a_block
-from .helpers import random_unmined_block, random_address, address_from_private_key, create_blockchain_gb
+from .helpers import random_unmined_block, random_address, address_from_private_key, create_blockchain_gb, \
+    random_hash
 
 # --- Constants --- #
 d = Decoder()
@@ -305,3 +306,249 @@ def test_memchain():
     assert test_chain.last_block.id == block_list_ids[test_chain.height]
     assert test_chain.chain[0].id == genesis_block.id == block_list_ids[0]
     assert test_chain.chain[1].id == block_list_ids[1]
+
+
+def test_load_chain():
+    # Create db with path in tests directory
+    current_path = os.getcwd()
+    if '/tests' in current_path:
+        dir_path = current_path + '/data/test_blockchain/'
+    else:
+        dir_path = './tests/data/test_blockchain/'
+    file_name = 'test_load_chain.db'
+
+    # Start with empty db
+    db = DataBase(dir_path, file_name)
+    db.wipe_db()
+    db.create_db()
+
+    # Create test logger
+    test_logger = logging.getLogger(__name__)
+    test_logger.setLevel('CRITICAL')
+    test_logger.propagate = False
+    sh = logging.StreamHandler()
+    sh.formatter = logging.Formatter(f.LOGGING_FORMAT)
+    test_logger.addHandler(sh)
+
+    # Blockchain
+    test_chain = create_blockchain_gb(
+        Blockchain(dir_path, file_name, logger=test_logger)
+    )
+
+    # Add blocks
+    while test_chain.height < 3:
+        mt = MiningTransaction(test_chain.height + 1, test_chain.mining_reward, 0, random_address(),
+                               test_chain.height + 1)
+        while utc_to_seconds() <= test_chain.last_block.timestamp:
+            pass
+        unmined_block = Block(test_chain.last_block.id, test_chain.target, 0, utc_to_seconds(), mt, [])
+        assert test_chain.add_block(mine_a_block(unmined_block))
+
+    # Chain state is saved with each block
+    state_dict = test_chain.chain_db.get_chain_state(test_chain.height)
+    assert state_dict == {
+        "height": test_chain.height,
+        "block_id": test_chain.last_block.id,
+        "target": test_chain.target,
+        "mining_reward": test_chain.mining_reward,
+        "total_mining_amount": test_chain.total_mining_amount,
+        "chain_work": test_chain.chain_work
+    }
+    assert test_chain.chain_work == sum([f.work_from_target(b.target) for b in test_chain.chain])
+
+    assert test_chain.check_chain_state()
+
+    # Load from chain state
+    loaded_chain = Blockchain(dir_path, file_name, logger=test_logger)
+    assert loaded_chain.height == test_chain.height
+    assert loaded_chain.target == test_chain.target
+    assert loaded_chain.mining_reward == test_chain.mining_reward
+    assert loaded_chain.total_mining_amount == test_chain.total_mining_amount
+    assert loaded_chain.chain_work == test_chain.chain_work
+    assert [b.id for b in loaded_chain.chain[1:]] == [b.id for b in test_chain.chain[1:]]
+
+    # Replay without chain state saves chain state
+    # The values set in create_blockchain_gb aren't replayed, so compare with the replayed chain
+    test_chain.chain_db.query_db("""DELETE FROM chain_state""")
+    replayed_chain = Blockchain(dir_path, file_name, logger=test_logger)
+    assert replayed_chain.height == test_chain.height
+    assert [b.id for b in replayed_chain.chain[1:]] == [b.id for b in test_chain.chain[1:]]
+    assert test_chain.chain_db.get_chain_state(test_chain.height) == {
+        "height": replayed_chain.height,
+        "block_id": replayed_chain.last_block.id,
+        "target": replayed_chain.target,
+        "mining_reward": replayed_chain.mining_reward,
+        "total_mining_amount": replayed_chain.total_mining_amount,
+        "chain_work": replayed_chain.chain_work
+    }
+
+    # Chain state with wrong block id is replayed
+    test_chain.chain_db.post_chain_state(test_chain.height, random_hash(), 1, 1, 1, 1)
+    assert not test_chain.check_chain_state()
+    replayed_chain = Blockchain(dir_path, file_name, logger=test_logger)
+    assert replayed_chain.height == test_chain.height
+    assert replayed_chain.mining_reward != 1
+    assert replayed_chain.check_chain_state()
+
+    # Pop block restores previous chain state
+    previous_state = test_chain.chain_db.get_chain_state(test_chain.height - 1)
+    assert test_chain.pop_block()
+    assert test_chain.chain_db.get_chain_state(test_chain.height + 1) == {}
+    assert test_chain.target == previous_state['target']
+    assert test_chain.mining_reward == previous_state['mining_reward']
+    assert test_chain.total_mining_amount == previous_state['total_mining_amount']
+    assert test_chain.chain_work == previous_state['chain_work']
+
+
+def test_failed_fork():
+    # Create db with path in tests directory
+    current_path = os.getcwd()
+    if '/tests' in current_path:
+        dir_path = current_path + '/data/test_blockchain/'
+    else:
+        dir_path = './tests/data/test_blockchain/'
+    file_name = 'test_failed_fork.db'
+
+    # Start with empty db
+    db = DataBase(dir_path, file_name)
+    db.wipe_db()
+    db.create_db()
+
+    # Create test logger
+    test_logger = logging.getLogger(__name__)
+    test_logger.setLevel('CRITICAL')
+    test_logger.propagate = False
+    sh = logging.StreamHandler()
+    sh.formatter = logging.Formatter(f.LOGGING_FORMAT)
+    test_logger.addHandler(sh)
+
+    # Blockchain
+    test_chain = create_blockchain_gb(
+        Blockchain(dir_path, file_name, logger=test_logger)
+    )
+    genesis_block = test_chain.chain[0]
+
+    def next_block(prev_block: Block, block_height: int):
+        mt = MiningTransaction(prev_block.height + 1, test_chain.mining_reward, 0, random_address(), block_height)
+        while utc_to_seconds() <= prev_block.timestamp:
+            pass
+        return mine_a_block(Block(prev_block.id, test_chain.target, 0, utc_to_seconds(), mt, []))
+
+    # Chain of 2 blocks
+    block1 = next_block(genesis_block, 1)
+    assert test_chain.add_block(block1)
+    block2 = next_block(block1, 2)
+    assert test_chain.add_block(block2)
+
+    # Fork with invalid mining utxo block height in second block - same work as chain so no reorganisation
+    fork1 = next_block(genesis_block, 1)
+    assert not test_chain.add_block(fork1)
+    fork2 = next_block(fork1, 0)
+    assert not test_chain.add_block(fork2)
+    assert test_chain.forks == [{1: fork1.raw_block}, {2: fork2.raw_block}]
+    assert test_chain.fork_children[genesis_block.id] == [fork1.id]
+    assert test_chain.fork_children[fork1.id] == [fork2.id]
+    assert test_chain.fork_work[fork2.id] == test_chain.chain_work
+
+    # Heavier fork fails at invalid block - chain is restored and invalid block removed
+    fork3 = next_block(fork2, 3)
+    assert not test_chain.add_block(fork3)
+    assert test_chain.height == 2
+    assert test_chain.chain[1].id == block1.id
+    assert test_chain.last_block.id == block2.id
+    assert test_chain.forks == [{1: fork1.raw_block}]
+    assert test_chain.check_chain_state()
+
+
+def test_fork_work():
+    # Create db with path in tests directory
+    current_path = os.getcwd()
+    if '/tests' in current_path:
+        dir_path = current_path + '/data/test_blockchain/'
+    else:
+        dir_path = './tests/data/test_blockchain/'
+    file_name = 'test_fork_work.db'
+
+    # Start with empty db
+    db = DataBase(dir_path, file_name)
+    db.wipe_db()
+    db.create_db()
+
+    # Create test logger
+    test_logger = logging.getLogger(__name__)
+    test_logger.setLevel('CRITICAL')
+    test_logger.propagate = False
+    sh = logging.StreamHandler()
+    sh.formatter = logging.Formatter(f.LOGGING_FORMAT)
+    test_logger.addHandler(sh)
+
+    # Blockchain
+    test_chain = create_blockchain_gb(
+        Blockchain(dir_path, file_name, logger=test_logger)
+    )
+    genesis_block = test_chain.chain[0]
+
+    # Chain of 2 blocks
+    prev_block = genesis_block
+    for height in range(1, 3):
+        mt = MiningTransaction(height, test_chain.mining_reward, 0, random_address(), height)
+        while utc_to_seconds() <= prev_block.timestamp:
+            pass
+        prev_block = mine_a_block(Block(prev_block.id, test_chain.target, 0, utc_to_seconds(), mt, []))
+        assert test_chain.add_block(prev_block)
+    chain_ids = [block.id for block in test_chain.chain]
+    chain_work = test_chain.chain_work
+
+    # Fork blocks claiming huge work with an invalid hash, in the fork range and above the chain
+    for (prev_id, height) in [(genesis_block.id, 1), (test_chain.last_block.id, 3)]:
+        mt = MiningTransaction(height, test_chain.mining_reward, 0, random_address(), height)
+        fork_block = Block(prev_id, 1, 0, test_chain.last_block.timestamp + 1, mt, [])
+        assert int(fork_block.id, 16) > fork_block.target
+        assert f.work_from_target(fork_block.target) > chain_work
+        assert test_chain.get_chain_work(fork_block) is None
+        assert not test_chain.add_block(fork_block)
+
+    # Mined fork block with a target other than the chain target
+    mt = MiningTransaction(1, test_chain.mining_reward, 0, random_address(), 1)
+    easy_block = mine_a_block(Block(genesis_block.id, test_chain.target * 2, 0, genesis_block.timestamp + 1, mt, []))
+    assert not test_chain.add_block(easy_block)
+
+    # Chain isn't reorganized and no forks saved
+    assert [block.id for block in test_chain.chain] == chain_ids
+    assert test_chain.chain_work == chain_work
+    assert test_chain.forks == []
+    assert test_chain.fork_work == {}
+    assert test_chain.check_chain_state()
+
+    # Fork branch from genesis at the chain target, with the target of a forked parent taken from the fork tree
+    fork_blocks = []
+    prev_block = genesis_block
+    for height in range(1, 4):
+        mt = MiningTransaction(height, test_chain.mining_reward, 0, random_address(), height)
+        prev_block = mine_a_block(Block(prev_block.id, test_chain.target, 0, prev_block.timestamp + 1, mt, []))
+        fork_blocks.append(prev_block)
+
+    # Forked child with a target other than its parent's target
+    mt = MiningTransaction(2, test_chain.mining_reward, 0, random_address(), 2)
+    easy_child = mine_a_block(Block(fork_blocks[0].id, test_chain.target * 2, 0, fork_blocks[0].timestamp + 1, mt, []))
+
+    # Fork blocks saved, easy child rejected
+    for fork_block in fork_blocks[:2]:
+        assert not test_chain.add_block(fork_block)
+        assert fork_block.id in test_chain.fork_blocks
+    assert test_chain.expected_target(easy_child) == fork_blocks[0].target
+    assert not test_chain.add_block(easy_child)
+    assert easy_child.id not in test_chain.fork_blocks
+
+    # Target of a forked parent at a heartbeat is adjusted using the branch timestamps
+    test_chain.heartbeat = 2
+    elapsed_time = fork_blocks[1].timestamp - fork_blocks[0].timestamp
+    assert test_chain.expected_target(fork_blocks[2]) == test_chain.adjust_target(test_chain.target, elapsed_time)
+    assert test_chain.expected_target(fork_blocks[2]) != test_chain.target
+    test_chain.heartbeat = f.HEARTBEAT
+
+    # Branch ending above the chain has more work and replaces the chain
+    assert test_chain.get_chain_work(fork_blocks[2]) > chain_work
+    assert test_chain.add_block(fork_blocks[2])
+    assert [block.id for block in test_chain.chain] == [genesis_block.id] + [block.id for block in fork_blocks]
+    assert test_chain.check_chain_state()
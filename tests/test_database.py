@@ -4,9 +4,11 @@ Tests for the database class
 import json
 import os
 import secrets
+import sqlite3
+import threading
 from pathlib import Path
 
-from .context import DataBase, Block, Formatter, utc_to_seconds
+from .context import DataBase, Block, Formatter, UTXO_OUTPUT, utc_to_seconds
 from .helpers import random_hash, random_utxo_output, random_address, random_tx, random_mining_tx, \
     random_target, random_nonce
 
@@ -35,12 +37,10 @@ def test_utxo_methods():
     utxo_list = []
     tx_list = []
     for x in range(random_length):
-        utxo_list.append(random_utxo_output())
+        random_utxo = random_utxo_output()
+        utxo_list.append(UTXO_OUTPUT(random_utxo.amount, fixed_address, random_utxo.block_height))
         tx_list.append(random_hash())
 
-    for utxo in utxo_list:
-        utxo.address = fixed_address
-
     # post_utxo
     for x in range(len(utxo_list)):
         db.post_utxo(tx_list[x], x, utxo_list[x])
@@ -137,3 +137,194 @@ def test_block_methods():
     for w in range(random_length):
         db.delete_block()
         assert db.get_raw_block(random_length - w) == {}
+
+
+def test_connections():
+    # Create db with path in tests directory
+    current_path = os.getcwd()
+    if '/tests' in current_path:
+        dir_path = current_path + '/data/test_database/'
+    else:
+        dir_path = './tests/data/test_database/'
+    file_name = 'test_connections.db'
+
+    # Start with empty db
+    db = DataBase(dir_path, file_name)
+    db.wipe_db()
+    db.create_db()
+
+    # Same connection reused in a thread
+    connection = db.connection
+    db.post_utxo(random_hash(), 0, random_utxo_output())
+    assert db.connection is connection
+
+    # Each thread has its own connection and sees committed data
+    thread_results = []
+
+    def read_in_thread():
+        thread_results.append((db.connection is not connection, db.query_db("""SELECT COUNT(*) FROM utxo_pool""")))
+
+    thread = threading.Thread(target=read_in_thread)
+    thread.start()
+    thread.join()
+    assert thread_results == [(True, [(1,)])]
+
+    # Closing connection creates a new one on next query
+    db.close()
+    assert db.query_db("""SELECT COUNT(*) FROM utxo_pool""") == [(1,)]
+    assert db.connection is not connection
+
+
+def test_apply_and_revert_block():
+    # Create db with path in tests directory
+    current_path = os.getcwd()
+    if '/tests' in current_path:
+        dir_path = current_path + '/data/test_database/'
+    else:
+        dir_path = './tests/data/test_database/'
+    file_name = 'test_apply_block.db'
+
+    # Start with empty db
+    db = DataBase(dir_path, file_name)
+    db.wipe_db()
+    db.create_db()
+
+    # Random block
+    transactions = [random_tx() for _ in range(3)]
+    block = Block(random_hash(), random_target(), random_nonce(), utc_to_seconds(), random_mining_tx(), transactions)
+
+    # Post utxos consumed by block
+    restored_utxos = []
+    for tx in transactions:
+        for utxo_input in tx.inputs:
+            utxo_output = random_utxo_output()
+            db.post_utxo(utxo_input.tx_id, utxo_input.index, utxo_output)
+            restored_utxos.append((utxo_input.tx_id, utxo_input.index, utxo_output))
+
+    # Apply block
+    db.apply_block(block)
+    assert db.get_raw_block(0) == {"raw_block": block.raw_block}
+    assert db.get_utxo(block.mining_tx.id, 0) != {}
+    for tx in transactions:
+        for x in range(tx.output_count):
+            assert db.get_utxo(tx.id, x)['amount'] == tx.outputs[x].amount
+    for (tx_id, tx_index, _) in restored_utxos:
+        assert db.get_utxo(tx_id, tx_index) == {}
+
+    # Consumed utxos saved as undo records
+    assert db.get_undo_count(0) == len(restored_utxos)
+
+    def assert_reverted():
+        assert db.get_height()['height'] == -1
+        assert db.get_utxo(block.mining_tx.id, 0) == {}
+        for tx in transactions:
+            for x in range(tx.output_count):
+                assert db.get_utxo(tx.id, x) == {}
+        for (tx_id, tx_index, utxo_output) in restored_utxos:
+            assert db.get_utxo(tx_id, tx_index) == {
+                "tx_id": tx_id,
+                "tx_index": tx_index,
+                "amount": utxo_output.amount,
+                "address": utxo_output.address,
+                "block_height": utxo_output.block_height
+            }
+        assert db.get_undo_count(0) == 0
+
+    # Revert block from undo records
+    db.revert_block(block)
+    assert_reverted()
+
+    # Revert block from given utxos
+    db.apply_block(block)
+    db.revert_block(block, restored_utxos)
+    assert_reverted()
+
+
+def test_migrate_db():
+    # Create db with path in tests directory
+    current_path = os.getcwd()
+    if '/tests' in current_path:
+        dir_path = current_path + '/data/test_database/'
+    else:
+        dir_path = './tests/data/test_database/'
+    file_name = 'test_migrate.db'
+
+    # Create version 0 db with hex string values
+    Path(dir_path).mkdir(parents=True, exist_ok=True)
+    Path(dir_path, file_name).unlink(missing_ok=True)
+    con = sqlite3.connect(Path(dir_path, file_name).as_posix())
+    con.execute("""CREATE TABLE raw_blocks(raw_block text)""")
+    con.execute("""CREATE TABLE utxo_pool (tx_id text, tx_index text, amount text, address text, block_height text)""")
+    utxo_list = [(random_hash(), x, random_utxo_output()) for x in range(5)]
+    for (tx_id, tx_index, utxo) in utxo_list:
+        con.execute("""INSERT INTO utxo_pool VALUES (?,?,?,?,?)""",
+                    (tx_id, hex(tx_index), hex(utxo.amount), utxo.address, hex(utxo.block_height)))
+    block = Block(random_hash(), random_target(), random_nonce(), utc_to_seconds(), random_mining_tx(), [random_tx()])
+    con.execute("""INSERT INTO raw_blocks VALUES (?)""", (block.raw_block,))
+    con.commit()
+    con.close()
+
+    # Opening the db migrates the utxos and raw blocks and builds the tx locations
+    db = DataBase(dir_path, file_name)
+    assert db.schema_version == db.SCHEMA_VERSION
+    assert db.get_tx_location(block.tx_ids[1]) == {"height": 0, "position": 1}
+    assert db.get_raw_block(0) == {"raw_block": block.raw_block}
+    assert db.get_raw_block_binary(0) == db.f.to_binary(block.raw_block)
+    assert len(db.get_raw_block_binary(0)) == len(block.raw_block) // 2 + 1
+    for (tx_id, tx_index, utxo) in utxo_list:
+        assert db.get_utxo(tx_id, tx_index) == {
+            "tx_id": tx_id,
+            "tx_index": tx_index,
+            "amount": utxo.amount,
+            "address": utxo.address,
+            "block_height": utxo.block_height
+        }
+
+    # Invested amount compares block heights as integers
+    block_height = utxo_list[0][2].block_height
+    assert db.get_invested_amount(block_height) == sum(
+        utxo.amount for (_, _, utxo) in utxo_list if utxo.block_height >= block_height)
+
+
+def test_tx_locations():
+    # Create db with path in tests directory
+    current_path = os.getcwd()
+    if '/tests' in current_path:
+        dir_path = current_path + '/data/test_database/'
+    else:
+        dir_path = './tests/data/test_database/'
+    file_name = 'test_tx_locations.db'
+
+    # Start with empty db
+    db = DataBase(dir_path, file_name)
+    db.wipe_db()
+    db.create_db()
+
+    # Apply random blocks
+    block_list = []
+    for _ in range(3):
+        transactions = [random_tx() for _ in range(2)]
+        block = Block(random_hash(), random_target(), random_nonce(), utc_to_seconds(), random_mining_tx(),
+                      transactions)
+        db.apply_block(block)
+        block_list.append(block)
+
+    # Tx locations agree with blocks
+    for height in range(len(block_list)):
+        tx_ids = block_list[height].tx_ids
+        for position in range(len(tx_ids)):
+            assert db.get_tx_location(tx_ids[position]) == {"height": height, "position": position}
+    assert db.get_tx_location(random_hash()) == {}
+    assert db.get_tx_location('not a tx id') == {}
+
+    # Rebuild agrees with apply_block
+    rows = db.query_db("""SELECT * FROM tx_locations ORDER BY tx_id""")
+    db.rebuild_tx_locations()
+    assert db.query_db("""SELECT * FROM tx_locations ORDER BY tx_id""") == rows
+
+    # Revert block removes its tx locations
+    last_block = block_list[-1]
+    db.revert_block(last_block, [])
+    for tx_id in last_block.tx_ids:
+        assert db.get_tx_location(tx_id) == {}
+    assert db.get_tx_location(block_list[0].mining_tx.id) == {"height": 0, "position": 0}
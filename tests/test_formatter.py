@@ -4,6 +4,8 @@ Tests for formatter and decoder
 import random
 import secrets
 
+import pytest
+
 from .context import Decoder, Formatter
 from .helpers import random_hash, random_public_key, random_address, random_signature, random_target_exponent, \
     random_target_coefficient, random_target
@@ -43,6 +45,17 @@ def test_base58():
 
     assert f.int_to_base58(f.base58_to_int(random_base58_string)) == random_base58_string
 
+    # Symbols outside the alphabet
+    with pytest.raises(ValueError):
+        f.base58_to_int('10OIl')
+
+    # Address lists
+    addresses = [random_address() for _ in range(3)]
+    addresses += addresses[:2]
+    hex_addresses = f.hex_addresses(addresses)
+    assert hex_addresses == [f.hex_address(address) for address in addresses]
+    assert f.base58_addresses(hex_addresses) == addresses
+
 
 def test_verify_address():
     assert d.verify_address(random_address())
@@ -54,6 +67,41 @@ def test_verify_signature():
     assert d.verify_signature(signature, tx_id)
 
 
+def test_binary():
+    '''
+    Raw strings round trip through the binary format at half the size
+    '''
+    raw_hex = random_hash() + random_signature(random_hash())
+    raw_bytes = f.to_binary(raw_hex)
+    assert raw_bytes[0] == f.BINARY_VERSION
+    assert len(raw_bytes) == len(raw_hex) // 2 + 1
+    assert f.from_binary(raw_bytes) == raw_hex
+
+    # Only lowercase hex of whole bytes is encoded
+    for bad_raw in [raw_hex.upper(), raw_hex[:-1], raw_hex + ' ', 'zz']:
+        with pytest.raises(ValueError):
+            f.to_binary(bad_raw)
+
+    # Unknown binary version
+    with pytest.raises(ValueError):
+        f.from_binary(bytes([0xff]) + raw_bytes[1:])
+
+
+def test_key_cache():
+    '''
+    Cached point and address must agree with the uncached values
+    '''
+    cpk, ecdsa_tuple = d.decode_signature(random_signature(random_hash()))
+    hits = f.KEY_CACHE.hits
+    point, address = f.cpk_key(cpk)
+    assert point == f.CURVE.decompress_point(cpk)
+    assert address == f.address(cpk)
+    assert f.cpk_point(cpk) == point
+    assert Formatter().cpk_address(cpk) == address
+    assert f.KEY_CACHE.hits == hits + 2
+    assert f.KEY_CACHE.stats['hit_rate'] > 0
+
+
 def test_target():
     # Test parts --> target --> parts
     random_coeff = random_target_coefficient()
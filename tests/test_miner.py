@@ -0,0 +1,150 @@
+'''
+Tests for the Miner class
+'''
+import threading
+
+from .context import Miner, Formatter, Header, search_nonces, calc_merkle_root
+from .helpers import random_unmined_block, random_hash, random_header
+
+# --- CONSTANTS --- #
+f = Formatter()
+
+
+def test_mine():
+    '''
+    A Block mined across several workers must have id under the target. Workers persist between templates.
+    '''
+    miner = Miner(workers=2)
+    target = f.target_from_parts(f.STARTING_TARGET_COEFFICIENT, 0x20)
+
+    unmined_block1 = random_unmined_block(random_hash(), 1, 0, target)
+    mined_block1 = miner.mine(unmined_block1)
+    assert int(mined_block1.id, 16) <= target
+    assert mined_block1.prev_id == unmined_block1.prev_id
+    assert not miner.is_mining
+
+    # Same workers mine the next template
+    pids = [p.pid for p in miner.processes]
+    unmined_block2 = random_unmined_block(mined_block1.id, 2, 0, target)
+    mined_block2 = miner.mine(unmined_block2)
+    assert int(mined_block2.id, 16) <= target
+    assert [p.pid for p in miner.processes] == pids
+
+    # Telemetry
+    stats = miner.stats
+    assert stats['templates'] == stats['blocks_mined'] == 2
+    assert stats['stale_templates'] == 0
+    assert stats['template_nonces'] > 0
+    assert stats['total_nonces'] >= stats['template_nonces']
+    assert len(stats['worker_hashrates']) == 2
+    assert stats['last_time_to_block'] is not None
+
+    # Nonce ranges partition the nonce space
+    ranges = miner.nonce_ranges()
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == pow(16, f.NONCE_CHARS)
+    for x in range(len(ranges) - 1):
+        assert ranges[x][1] == ranges[x + 1][0]
+
+    # Shutdown ends workers
+    miner.shutdown()
+    assert not miner.is_running
+
+
+def test_epoch_before_start():
+    '''
+    An epoch taken before the workers start stays current, so the first template isn't dropped as stale
+    '''
+    miner = Miner(workers=2)
+    target = f.target_from_parts(f.STARTING_TARGET_COEFFICIENT, 0x20)
+
+    # Cold start
+    epoch = miner.next_epoch()
+    mined_block = miner.mine(random_unmined_block(random_hash(), 1, 0, target), epoch)
+    assert mined_block is not None
+    assert miner.stale_templates == 0
+
+    # Restart after the workers end
+    miner.shutdown()
+    epoch = miner.next_epoch()
+    assert miner.mine(random_unmined_block(mined_block.id, 2, 0, target), epoch) is not None
+    assert miner.stale_templates == 0
+
+    miner.shutdown()
+
+
+def test_stop():
+    '''
+    Stopping the Miner cancels the template and mine returns None. Workers remain running.
+    '''
+    miner = Miner(workers=2)
+    unmined_block = random_unmined_block(random_hash(), 1, 0, 1)
+
+    stop_timer = threading.Timer(1, miner.stop)
+    stop_timer.start()
+    assert miner.mine(unmined_block) is None
+    assert not miner.is_mining
+    assert miner.is_running
+
+    # Telemetry
+    assert miner.stale_templates == 1
+    assert miner.blocks_mined == 0
+    assert miner.template_nonces > 0
+    assert miner.hashrate > 0
+
+    miner.shutdown()
+
+
+def test_search_nonces():
+    '''
+    The prefix hashing path must agree with Header.id
+    '''
+    random_header_values = random_header()
+    header = Header(random_header_values.prev_id, random_header_values.merkle_root,
+                    f.target_from_parts(f.STARTING_TARGET_COEFFICIENT, 0x20), 0, random_header_values.timestamp)
+
+    # Found nonce agrees with header id
+    nonce = search_nonces(header, 0, pow(16, f.NONCE_CHARS))
+    assert nonce is not None
+    header.nonce = nonce
+    assert int(header.id, 16) <= header.target
+
+    # Every nonce skipped has header id above target
+    for x in range(nonce):
+        header.nonce = x
+        assert int(header.id, 16) > header.target
+
+    # No nonce found for impossible target
+    header = Header(header.prev_id, header.merkle_root, 1, 0, header.timestamp)
+    assert search_nonces(header, 0, 0x100) is None
+
+
+def test_timestamp_and_extra_nonce():
+    '''
+    Workers roll the timestamp when their nonce range is exhausted, then the Miner rolls the extra nonce
+    '''
+    target = f.target_from_parts(f.STARTING_TARGET_COEFFICIENT, 0x20)
+
+    # Only 1 nonce for each worker
+    miner = Miner(workers=2)
+    miner.nonce_space = 2
+
+    # Roll timestamps
+    unmined_block = random_unmined_block(random_hash(), 1, 0, target)
+    start_timestamp = unmined_block.timestamp
+    block_height = unmined_block.mining_tx.mining_utxo.block_height
+    mined_block = miner.mine(unmined_block, max_timestamp=start_timestamp + 0x100)
+    assert int(mined_block.id, 16) <= target
+    assert start_timestamp <= mined_block.timestamp <= start_timestamp + 0x100
+    assert mined_block.mining_tx.mining_utxo.block_height == block_height
+
+    # Roll extra nonce without timestamps
+    unmined_block = random_unmined_block(random_hash(), 1, 0, target)
+    start_timestamp = unmined_block.timestamp
+    mined_block = miner.mine(unmined_block)
+    assert int(mined_block.id, 16) <= target
+    assert mined_block.timestamp == start_timestamp
+    assert mined_block.mining_tx.mining_utxo.block_height == block_height + miner.extra_nonces
+    assert mined_block.merkle_root == mined_block.header.merkle_root == calc_merkle_root(mined_block.tx_ids)
+
+    miner.shutdown()
@@ -192,3 +192,117 @@ def test_add_transaction():
 #     assert node1.blockchain.chain_db.get_height()['height'] == 0
 #     assert node2.height == 0
 #     assert node2.blockchain.chain_db.get_height()['height'] == 0
+
+
+def test_refresh_miner():
+    # Create db with path in tests directory
+    current_path = os.getcwd()
+    if '/tests' in current_path:
+        dir_path = current_path + '/data/test_node/'
+    else:
+        dir_path = './tests/data/test_node/'
+    file_name = 'test_refresh_miner.db'
+
+    # Logging
+    # Create test logger
+    test_logger = logging.getLogger(__name__)
+    test_logger.setLevel('CRITICAL')
+    test_logger.propagate = False
+
+    # Create Node
+    n = create_node_gb(
+        Node(dir_path, file_name, logger=test_logger, local=True, mining_workers=2)
+    )
+    n.is_connected = True
+
+    # Mine necessary Block
+    mined_block1 = mine_a_block(create_test_node_block(n, n.last_block.timestamp))
+    assert n.add_block(mined_block1)
+
+    # Validated transaction - signature verified once and saved in the cache
+    tx_id = n.last_block.mining_tx.id
+    amount = n.mining_reward // 2
+    new_tx = Transaction([UTXO_INPUT(tx_id, 0, n.wallet.sign_transaction(tx_id))],
+                         [UTXO_OUTPUT(amount - 1, n.wallet.address), UTXO_OUTPUT(amount - 1, n.wallet.address)])
+    assert n.add_transaction(new_tx)
+    signature_misses = n.cache_stats['signatures']['misses']
+
+    # Wait for the transaction in the template
+    n.start_miner()
+    start_time = time.time()
+    while (new_tx not in n.block_transactions or not n.miner.is_running) and n.height < 2 and time.time() - start_time < 30:
+        time.sleep(0.01)
+
+    # Refresh template - same workers and monitor thread keep mining, and the template transactions are kept
+    pids = [p.pid for p in n.miner.processes]
+    n.refresh_miner()
+    while n.height < 2 and time.time() - start_time < 30:
+        time.sleep(0.1)
+    assert n.height >= 2
+    assert new_tx.id in n.blockchain.get_block_by_height(2).tx_ids
+    assert n.validated_transactions == []
+    assert n.cache_stats['signatures']['misses'] == signature_misses
+    assert [p.pid for p in n.miner.processes] == pids
+    assert n.mining_thread.is_alive()
+
+    # Stop miner - workers remain running
+    n.stop_miner()
+    assert not n.mining_thread.is_alive()
+    assert n.block_transactions == []
+    assert n.miner.is_running
+    n.miner.shutdown()
+
+
+def test_noncanonical_transaction():
+    # Create db with path in tests directory
+    current_path = os.getcwd()
+    if '/tests' in current_path:
+        dir_path = current_path + '/data/test_node/'
+    else:
+        dir_path = './tests/data/test_node/'
+    file_name = 'test_noncanonical_transaction.db'
+
+    # Logging
+    # Create test logger
+    test_logger = logging.getLogger(__name__)
+    test_logger.setLevel('CRITICAL')
+    test_logger.propagate = False
+
+    # Create Node
+    n = create_node_gb(
+        Node(dir_path, file_name, logger=test_logger, local=True, mining_workers=2)
+    )
+    n.is_connected = True
+
+    # Mine necessary Block
+    mined_block1 = mine_a_block(create_test_node_block(n, n.last_block.timestamp))
+    assert n.add_block(mined_block1)
+
+    # Transaction with uppercase hex r and s in the signature
+    tx_id = n.last_block.mining_tx.id
+    signature = n.wallet.sign_transaction(tx_id)
+    rs_index = len(signature) - 2 * f.HASH_CHARS
+    upper_signature = signature[:rs_index] + signature[rs_index:].upper()
+    assert upper_signature != signature
+    amount = n.mining_reward // 2
+    upper_tx = Transaction([UTXO_INPUT(tx_id, 0, upper_signature)],
+                           [UTXO_OUTPUT(amount - 1, n.wallet.address), UTXO_OUTPUT(amount - 1, n.wallet.address)])
+
+    # Rejected from the mempool
+    assert not n.add_transaction(upper_tx)
+    assert n.validated_transactions == []
+    assert n.consumed_utxos == []
+
+    # A template containing it is evicted once its mined block fails validation, and mining continues
+    n.validated_transactions.append(upper_tx)
+    n.consumed_utxos.append((tx_id, 0))
+    n.start_miner()
+    start_time = time.time()
+    while n.height < 2 and time.time() - start_time < 30:
+        time.sleep(0.1)
+    n.stop_miner()
+    n.miner.shutdown()
+    assert n.height >= 2
+    assert upper_tx.id not in n.blockchain.get_block_by_height(2).tx_ids
+    assert upper_tx not in n.validated_transactions
+    assert n.consumed_utxos == []
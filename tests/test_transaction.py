@@ -43,3 +43,31 @@ def test_mining_tx():
     # Asserts
     assert decoded_mining_tx.id == mining_tx.id
     assert decoded_mining_tx.raw_tx == raw_mining_tx
+
+
+def test_read_offsets():
+    '''
+    Transactions decoded by offset from a shared raw string return the offset where they end
+    '''
+    # Decoder
+    d = Decoder()
+
+    # Consecutive raw transactions after a prefix
+    tx_list = [random_tx() for _ in range(3)]
+    mining_tx = random_mining_tx()
+    prefix = 'ff' * 5
+    raw = prefix + mining_tx.raw_tx + ''.join([tx.raw_tx for tx in tx_list])
+
+    # Decode in order
+    decoded_mining_tx, offset = d.read_mining_transaction(raw, len(prefix))
+    assert decoded_mining_tx.id == mining_tx.id
+    assert offset == len(prefix) + len(mining_tx.raw_tx)
+    for tx in tx_list:
+        decoded_tx, end = d.read_transaction(raw, offset)
+        assert decoded_tx.id == tx.id
+        assert end - offset == len(tx.raw_tx)
+        offset = end
+    assert offset == len(raw)
+
+    # Wrong type returns None and the given offset
+    assert d.read_transaction(raw, 0) == (None, 0)
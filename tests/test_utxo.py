@@ -2,7 +2,7 @@
 Tests for the UTXO class
 '''
 
-from .context import UTXO_INPUT, UTXO_OUTPUT, Decoder
+from .context import UTXO_INPUT, UTXO_OUTPUT, Decoder, Formatter
 from .helpers import random_hash, random_signature, random_index, random_amount, random_height, random_address
 
 
@@ -38,3 +38,32 @@ def test_utxo():
     # Assertions
     assert utxo_output.raw_utxo == decoded_utxo_output.raw_utxo
     assert utxo_output.id == decoded_utxo_output.id
+
+
+def test_hex_address():
+    '''
+    Outputs save their hex address, and decoded outputs save the hex address read from the raw output
+    '''
+    # Decoder and Formatter
+    d = Decoder()
+    f = Formatter()
+
+    # Hex address computed once
+    utxo_output = UTXO_OUTPUT(random_amount(), random_address(), random_height())
+    assert utxo_output.hex_address == f.hex_address(utxo_output.address)
+    assert utxo_output.hex_address is utxo_output.hex_address
+
+    # Decoded output keeps the hex address from the raw output
+    raw_utxo = utxo_output.raw_utxo
+    decoded_utxo_output = d.raw_utxo_output(raw_utxo)
+    assert decoded_utxo_output._hex_address is not None
+    assert decoded_utxo_output.address == utxo_output.address
+    assert decoded_utxo_output.raw_utxo == raw_utxo
+
+    # Hex address which isn't formatted lowercase is formatted again, as before
+    index = d.v_index + f.AMOUNT_CHARS
+    upper_raw_utxo = raw_utxo[:index] + raw_utxo[index:index + f.ADDRESS_CHARS].upper() + \
+                     raw_utxo[index + f.ADDRESS_CHARS:]
+    upper_utxo_output = d.raw_utxo_output(upper_raw_utxo)
+    assert upper_utxo_output._hex_address is None
+    assert upper_utxo_output.raw_utxo == raw_utxo
@@ -0,0 +1,89 @@
+'''
+Tests for the Verifier class
+'''
+from .context import Verifier, Decoder, Formatter, verify_signatures, LRUCache
+from .helpers import random_hash, random_signature
+
+# --- CONSTANTS --- #
+d = Decoder()
+f = Formatter()
+
+
+def signature_tuple(signature: str, tx_id: str):
+    cpk, ecdsa_tuple = d.decode_signature(signature)
+    return tx_id, f.cpk_point(cpk), ecdsa_tuple
+
+
+def test_verify():
+    '''
+    Signatures verified on the pool must agree with verification in process
+    '''
+    verifier = Verifier(workers=2, min_parallel_signatures=4, cache_size=0)
+    tx_ids = [random_hash() for _ in range(16)]
+    signature_pairs = [(random_signature(tx_id), tx_id) for tx_id in tx_ids]
+    signatures = [signature_tuple(signature, tx_id) for (signature, tx_id) in signature_pairs]
+    assert verify_signatures(signatures)
+
+    # Small list verified in process
+    assert verifier.verify(signature_pairs[:2])
+    assert not verifier.is_running
+
+    # Large list verified on pool
+    assert len(verifier.batches(signatures)) == 8
+    assert sum([len(batch) for batch in verifier.batches(signatures)]) == len(signatures)
+    assert verifier.verify(signature_pairs)
+    assert verifier.is_running
+
+    # A single bad signature fails verification wherever it is in the list
+    for x in [0, 7, 15]:
+        signature, tx_id = signature_pairs[x]
+        bad_pairs = signature_pairs.copy()
+        bad_pairs[x] = (signature, random_hash())
+        assert not verify_signatures([signature_tuple(signature, tx_id) for (signature, tx_id) in bad_pairs])
+        assert not verifier.verify(bad_pairs)
+
+    # Failed epoch doesn't affect the next list
+    assert verifier.verify(signature_pairs)
+
+    verifier.shutdown()
+    assert not verifier.is_running
+
+
+def test_cache():
+    '''
+    Verified pairs are cached and failed pairs are not
+    '''
+    verifier = Verifier(workers=1, cache_size=4)
+    tx_ids = [random_hash() for _ in range(6)]
+    signature_pairs = [(random_signature(tx_id), tx_id) for tx_id in tx_ids]
+
+    assert verifier.verify(signature_pairs[:2])
+    assert all([pair in verifier.cache for pair in signature_pairs[:2]])
+
+    # Failed list caches nothing
+    bad_pair = (signature_pairs[2][0], random_hash())
+    assert not verifier.verify([signature_pairs[2], bad_pair])
+    assert signature_pairs[2] not in verifier.cache
+    assert bad_pair not in verifier.cache
+
+    # Cached pairs are hits
+    verifier.cache.clear()
+    assert verifier.verify(signature_pairs[:2])
+    assert verifier.verify(signature_pairs[:2])
+    assert verifier.cache.hits == 2
+
+    # Cache is bounded - least recently used pairs are dropped
+    assert verifier.verify(signature_pairs)
+    assert len(verifier.cache) == 4
+    assert signature_pairs[0] not in verifier.cache
+    assert signature_pairs[-1] in verifier.cache
+
+    # LRU order follows gets
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'a' in cache and 'b' not in cache
+    assert cache.get('b') is None
+    assert cache.hit_rate == 0.5
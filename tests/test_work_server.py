@@ -0,0 +1,75 @@
+'''
+Tests for the WorkServer class - runs on localhost
+'''
+import logging
+import os
+
+from .context import Node, WorkServer, WorkClient, Formatter
+from .helpers import create_node_gb
+
+# --- CONSTANTS --- #
+f = Formatter()
+
+
+def test_work_server():
+    # Create db with path in tests directory
+    current_path = os.getcwd()
+    if '/tests' in current_path:
+        dir_path = current_path + '/data/test_work_server/'
+    else:
+        dir_path = './tests/data/test_work_server/'
+    file_name = 'test_work_server.db'
+
+    # Logging
+    # Create test logger
+    test_logger = logging.getLogger(__name__)
+    test_logger.setLevel('CRITICAL')
+    test_logger.propagate = False
+
+    # Create Node and work server on an open port
+    n = create_node_gb(
+        Node(dir_path, file_name, logger=test_logger, local=True)
+    )
+    server = WorkServer(n, port=0, logger=test_logger)
+    server.start()
+    host, port = server.address
+
+    # Get work
+    client = WorkClient(host, port)
+    job = client.get_work()
+    assert job['raw_prefix'] == server.template.header.raw_prefix
+    assert int(job['target'], 16) == n.target
+    assert job['timestamp'] > n.last_block.timestamp
+
+    # Nonce ranges are disjoint
+    next_job = client.get_work()
+    assert next_job['start_nonce'] == job['end_nonce']
+
+    # Bad submissions
+    assert not client.submit('unknown', 0, job['timestamp'])['accepted']
+    assert not client.submit(job['job_id'], job['end_nonce'], job['timestamp'])['accepted']
+
+    # Timed out template keeps only the jobs for the outgoing template
+    old_template = server.template
+    server.template_time = 0
+    timeout_job = client.get_work()
+    assert server.template is not old_template
+    assert set(server.jobs) == {job['job_id'], next_job['job_id'], timeout_job['job_id']}
+    server.template_time = 0
+    client.get_work()
+    assert job['job_id'] not in server.jobs
+
+    # Jobs are capped with the oldest dropped
+    server.MAX_JOBS = 4
+    job_ids = [client.get_work()['job_id'] for _ in range(6)]
+    assert list(server.jobs) == job_ids[-4:]
+
+    # Mine blocks through the client
+    assert client.mine(blocks=2) == 2
+    assert n.height == 2
+
+    # Stale job from old template
+    assert not client.submit(job['job_id'], job['start_nonce'], job['timestamp'])['accepted']
+
+    client.close()
+    server.stop()
@@ -5,21 +5,28 @@ import json
 from hashlib import sha256
 
 from formatter import Formatter
+from frozen import Frozen
 from utxo import UTXO_OUTPUT
 
 
-class MiningTransaction():
+class MiningTransaction(Frozen):
     '''
     Every block must contain a MiningTransaction. We create the class instead of Transaction for ease of use.
     '''
+    __slots__ = ('height', 'reward', 'block_fees', 'mining_utxo', '_raw_tx', '_id')
+
     # Formatter
     f = Formatter()
 
-    def __init__(self, height: int, reward: int, block_fees: int, address: str, block_height=0):
-        self.height = height
-        self.reward = reward
-        self.block_fees = block_fees
-        self.mining_utxo = UTXO_OUTPUT(self.reward + self.block_fees, address, block_height)
+    def __init__(self, height: int, reward: int, block_fees: int, address: str, block_height=0, hex_address=None):
+        self.set_slot('height', height)
+        self.set_slot('reward', reward)
+        self.set_slot('block_fees', block_fees)
+        self.set_slot('mining_utxo', UTXO_OUTPUT(self.reward + self.block_fees, address, block_height, hex_address))
+
+        # Memoized values
+        self.set_slot('_raw_tx', None)
+        self.set_slot('_id', None)
 
     def __repr__(self):
         return self.to_json
@@ -37,39 +44,45 @@ class MiningTransaction():
 
     @property
     def raw_tx(self):
-        # Setup formatter
-        f = Formatter()
+        return self.memo('_raw_tx', self.format_raw_tx)
 
+    def format_raw_tx(self):
         # Type/version
-        type = format(f.MINING_TX_TYPE, f'0{f.TYPE_CHARS}x')
-        version = f.VERSION
+        type = format(self.f.MINING_TX_TYPE, f'0{self.f.TYPE_CHARS}x')
+        version = self.f.VERSION
 
         # Block info
-        height = format(self.height, f'0{f.HEIGHT_CHARS}x')
-        reward = format(self.reward, f'0{f.REWARD_CHARS}x')
-        block_fees = format(self.block_fees, f'0{f.AMOUNT_CHARS}x')
+        height = format(self.height, f'0{self.f.HEIGHT_CHARS}x')
+        reward = format(self.reward, f'0{self.f.REWARD_CHARS}x')
+        block_fees = format(self.block_fees, f'0{self.f.AMOUNT_CHARS}x')
 
         # Raw = type + version + block_info + mining_utxo
         return type + version + height + reward + block_fees + self.mining_utxo.raw_utxo
 
     @property
     def id(self):
-        return sha256(self.raw_tx.encode()).hexdigest()
+        return self.memo('_id', lambda: sha256(self.raw_tx.encode()).hexdigest())
 
 
-class Transaction():
+class Transaction(Frozen):
     '''
-    Transactions are instantiated with a list of utxo_inputs and utxo_outputs
+    Transactions are instantiated with a list of utxo_inputs and utxo_outputs, which are saved as tuples
     '''
+    __slots__ = ('inputs', 'outputs', 'input_count', 'output_count', '_raw_tx', '_id')
+
     # Formatter
     f = Formatter()
 
     def __init__(self, inputs: list, outputs: list):
-        self.inputs = inputs
-        self.outputs = outputs
+        self.set_slot('inputs', tuple(inputs))
+        self.set_slot('outputs', tuple(outputs))
 
-        self.input_count = len(self.inputs)
-        self.output_count = len(self.outputs)
+        self.set_slot('input_count', len(self.inputs))
+        self.set_slot('output_count', len(self.outputs))
+
+        # Memoized values
+        self.set_slot('_raw_tx', None)
+        self.set_slot('_id', None)
 
     def __repr__(self):
         return self.to_json
@@ -91,30 +104,24 @@ class Transaction():
 
     @property
     def raw_tx(self):
-        # Setup formatter
-        f = Formatter()
+        return self.memo('_raw_tx', self.format_raw_tx)
 
+    def format_raw_tx(self):
         # Type/version
-        type = format(f.TX_TYPE, f'0{f.TYPE_CHARS}x')
-        version = f.VERSION
+        type = format(self.f.TX_TYPE, f'0{self.f.TYPE_CHARS}x')
+        version = self.f.VERSION
 
         # Format counts
-        input_count = format(self.input_count, f'0{f.COUNT_CHARS}x')
-        output_count = format(self.output_count, f'0{f.COUNT_CHARS}x')
-
-        # Format input string
-        input_string = ''
-        for i in self.inputs:
-            input_string += i.raw_utxo
+        input_count = format(self.input_count, f'0{self.f.COUNT_CHARS}x')
+        output_count = format(self.output_count, f'0{self.f.COUNT_CHARS}x')
 
-        # Format output string
-        output_string = ''
-        for t in self.outputs:
-            output_string += t.raw_utxo
+        # Format input and output strings
+        input_string = ''.join([i.raw_utxo for i in self.inputs])
+        output_string = ''.join([t.raw_utxo for t in self.outputs])
 
         # Raw = type + version + input_count + inputs + output_count + output
         return type + version + input_count + input_string + output_count + output_string
 
     @property
     def id(self):
-        return sha256(self.raw_tx.encode()).hexdigest()
+        return self.memo('_id', lambda: sha256(self.raw_tx.encode()).hexdigest())
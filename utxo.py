@@ -5,17 +5,26 @@ import json
 from hashlib import sha256
 
 from formatter import Formatter
+from frozen import Frozen
 
 
-class UTXO_INPUT():
+class UTXO_INPUT(Frozen):
     '''
     The UTXO INPUT will reference an existing UTXO_OUTPUT by tx_id
     '''
+    __slots__ = ('tx_id', 'index', 'signature', '_raw_utxo', '_id')
+
+    # Setup formatter
+    f = Formatter()
 
     def __init__(self, tx_id: str, index: int, signature: str):
-        self.tx_id = tx_id
-        self.index = index
-        self.signature = signature
+        self.set_slot('tx_id', tx_id)
+        self.set_slot('index', index)
+        self.set_slot('signature', signature)
+
+        # Memoized values
+        self.set_slot('_raw_utxo', None)
+        self.set_slot('_id', None)
 
     def __repr__(self):
         return self.to_json
@@ -30,37 +39,46 @@ class UTXO_INPUT():
 
     @property
     def raw_utxo(self):
-        # Setup formatter
-        f = Formatter()
+        return self.memo('_raw_utxo', self.format_raw_utxo)
 
+    def format_raw_utxo(self):
         # Type version
-        type = format(f.UTXO_INPUT_TYPE, f'0{f.TYPE_CHARS}x')
-        version = f.VERSION
+        type = format(self.f.UTXO_INPUT_TYPE, f'0{self.f.TYPE_CHARS}x')
+        version = self.f.VERSION
 
         # Input values - signature already formatted
-        tx_id = format(int(self.tx_id, 16), f'0{f.HASH_CHARS}x')
-        index = format(self.index, f'0{f.INDEX_CHARS}x')
+        tx_id = format(int(self.tx_id, 16), f'0{self.f.HASH_CHARS}x')
+        index = format(self.index, f'0{self.f.INDEX_CHARS}x')
 
         # Raw = type + version + tx_id + index + signature
         return type + version + tx_id + index + self.signature
 
     @property
     def id(self):
-        return sha256(self.raw_utxo.encode()).hexdigest()
+        return self.memo('_id', lambda: sha256(self.raw_utxo.encode()).hexdigest())
 
 
-class UTXO_OUTPUT():
+class UTXO_OUTPUT(Frozen):
     '''
     The UTXO output will contain an amount, an address and a block_height where the amount can first be used.
     Block_height = 0 by default (used for Mining Outputs)
+    The hex form of the address is saved with the output, so the address is decoded from base58 at most once. The
+    Decoder passes in the hex address it has already read from the raw output.
     '''
+    __slots__ = ('amount', 'address', 'block_height', '_hex_address', '_raw_utxo', '_id')
+
     # Setup formatter
     f = Formatter()
 
-    def __init__(self, amount: int, address: str, block_height=0):
-        self.amount = amount
-        self.address = address
-        self.block_height = block_height
+    def __init__(self, amount: int, address: str, block_height=0, hex_address=None):
+        self.set_slot('amount', amount)
+        self.set_slot('address', address)
+        self.set_slot('block_height', block_height)
+
+        # Memoized values
+        self.set_slot('_hex_address', hex_address)
+        self.set_slot('_raw_utxo', None)
+        self.set_slot('_id', None)
 
     def __repr__(self):
         return self.to_json
@@ -73,23 +91,27 @@ class UTXO_OUTPUT():
             'block_height': self.block_height
         })
 
+    @property
+    def hex_address(self):
+        return self.memo('_hex_address', lambda: self.f.hex_address(self.address))
+
     @property
     def raw_utxo(self):
-        # Setup formatter
-        f = Formatter()
+        return self.memo('_raw_utxo', self.format_raw_utxo)
 
+    def format_raw_utxo(self):
         # Type version
-        type = format(f.UTXO_OUTPUT_TYPE, f'0{f.TYPE_CHARS}x')
-        version = f.VERSION
+        type = format(self.f.UTXO_OUTPUT_TYPE, f'0{self.f.TYPE_CHARS}x')
+        version = self.f.VERSION
 
         # Format values
-        amount = format(self.amount, f'0{f.AMOUNT_CHARS}x')
-        address = f.hex_address(self.address)
-        block_height = format(self.block_height, f'0{f.HEIGHT_CHARS}x')
+        amount = format(self.amount, f'0{self.f.AMOUNT_CHARS}x')
+        address = self.hex_address
+        block_height = format(self.block_height, f'0{self.f.HEIGHT_CHARS}x')
 
         # Raw = type + version + amount + address + block_height
         return type + version + amount + address + block_height
 
     @property
     def id(self):
-        return sha256(self.raw_utxo.encode()).hexdigest()
+        return self.memo('_id', lambda: sha256(self.raw_utxo.encode()).hexdigest())
@@ -0,0 +1,170 @@
+'''
+The Verifier class
+'''
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import Value
+
+from basicblockchains_ecc.elliptic_curve import secp256k1
+
+from cache import LRUCache
+from decoder import Decoder
+from formatter import Formatter
+
+# --- WORKER STATE --- #
+# Set in each worker process by init_worker
+CURVE = None
+FAILED_EPOCH = None
+
+
+# --- VERIFY METHODS --- #
+
+def verify_signatures(signatures: list, curve=None, epoch=None) -> bool:
+    '''
+    Verify a list of (tx_id, point, ecdsa_tuple) signatures in order, stopping at the first failure.
+    In a worker process the curve is the worker curve, and a batch whose epoch has been marked as failed by another
+    worker stops early. The result of a stopped batch is ignored.
+    '''
+    if curve is None:
+        curve = CURVE if CURVE else secp256k1()
+    for tx_id, point, ecdsa_tuple in signatures:
+        if epoch is not None and FAILED_EPOCH.value == epoch:
+            return False
+        if point is None or not curve.verify_signature(ecdsa_tuple, tx_id, point):
+            if epoch is not None:
+                FAILED_EPOCH.value = epoch
+            return False
+    return True
+
+
+def init_worker(failed_epoch):
+    global CURVE, FAILED_EPOCH
+    CURVE = secp256k1()
+    FAILED_EPOCH = failed_epoch
+
+
+class Verifier:
+    '''
+    The Verifier checks (signature, tx_id) pairs on a pool of worker processes. Pairs which have verified before are
+    kept in a bounded LRU cache, so a tx verified when it enters the mempool isn't verified again in its Block.
+    The remaining signatures are split into contiguous batches, several per worker, and the result is True only if
+    every batch verifies, so it doesn't depend on the order in which batches finish. The first failing batch cancels
+    the batches that haven't started and marks the epoch of the call as failed in shared memory, so running batches
+    stop at their next signature.
+    Small lists are verified in the calling process, and the pool is only started for the first large list.
+    '''
+    # Decoder and formatter
+    d = Decoder()
+    f = Formatter()
+
+    # Verified (signature, tx_id) pairs kept in the cache
+    CACHE_SIZE = pow(2, 16)
+
+    # Signatures below which the pool costs more than it saves
+    MIN_PARALLEL_SIGNATURES = 32
+
+    # Batches per worker - smaller batches let a failure cancel more of the work
+    BATCHES_PER_WORKER = 4
+
+    def __init__(self, workers=None, min_parallel_signatures=MIN_PARALLEL_SIGNATURES, cache_size=CACHE_SIZE,
+                 logger=None):
+        # Logging
+        if logger:
+            self.logger = logger.getChild('Verifier')
+        else:
+            self.logger = logging.getLogger('Verifier')
+            self.logger.setLevel('DEBUG')
+            self.logger.addHandler(logging.StreamHandler())
+
+        # Curve for signatures verified in process
+        self.curve = secp256k1()
+
+        # Number of worker processes
+        self.workers = workers if workers else os.cpu_count() or 1
+        self.min_parallel_signatures = min_parallel_signatures
+
+        # Epoch for each verify call and the shared epoch of the last failure
+        self.epoch = 0
+        self.failed_epoch = Value('Q', 0, lock=False)
+        self.lock = threading.Lock()
+
+        # Worker pool - started on first large list
+        self.pool = None
+
+        # Verified signatures
+        self.cache = LRUCache(cache_size)
+
+    @property
+    def is_running(self):
+        return self.pool is not None
+
+    def start(self):
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                            initargs=(self.failed_epoch,))
+            # Logging
+            self.logger.debug(f'Started {self.workers} verification workers')
+
+    def shutdown(self):
+        if self.pool is not None:
+            # cancel_futures is only available from Python 3.9
+            if sys.version_info >= (3, 9):
+                self.pool.shutdown(wait=True, cancel_futures=True)
+            else:
+                self.pool.shutdown(wait=True)
+            self.pool = None
+
+    def batches(self, signatures: list) -> list:
+        '''
+        Split the signatures into contiguous batches
+        '''
+        batch_count = min(len(signatures), self.workers * self.BATCHES_PER_WORKER)
+        batch_size = -(-len(signatures) // batch_count)
+        return [signatures[x:x + batch_size] for x in range(0, len(signatures), batch_size)]
+
+    def verify(self, signature_pairs: list) -> bool:
+        '''
+        Returns True if every (signature, tx_id) pair in the list verifies. Pairs are saved in the cache once the whole
+        list verifies.
+        '''
+        uncached_pairs = [pair for pair in signature_pairs if self.cache.get(pair) is None]
+        signatures = []
+        for signature, tx_id in uncached_pairs:
+            decoded_signature = self.d.decode_signature(signature)
+            if decoded_signature is None:
+                return False
+            cpk, ecdsa_tuple = decoded_signature
+            signatures.append((tx_id, self.f.cpk_point(cpk), ecdsa_tuple))
+
+        if not self.verify_decoded(signatures):
+            return False
+        for pair in uncached_pairs:
+            self.cache.put(pair, True)
+        return True
+
+    def verify_decoded(self, signatures: list) -> bool:
+        '''
+        Returns True if every (tx_id, point, ecdsa_tuple) signature in the list verifies. The point is decompressed in
+        the calling process through the key cache, so workers only run ECDSA.
+        '''
+        if len(signatures) < self.min_parallel_signatures or self.workers == 1:
+            return verify_signatures(signatures, self.curve)
+
+        with self.lock:
+            self.start()
+            self.epoch += 1
+            epoch = self.epoch
+            pending = {self.pool.submit(verify_signatures, batch, None, epoch) for batch in self.batches(signatures)}
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            if not all(future.result() for future in done):
+                # Cancel remaining batches
+                self.failed_epoch.value = epoch
+                for future in pending:
+                    future.cancel()
+                return False
+        return True
@@ -80,8 +80,9 @@ class Wallet():
         self.private_key, self.public_key = self.get_keys(seed)
         self.compressed_public_key = self.F.cpk(self.public_key)
 
-        # Create address
+        # Create address - hex address saved for the outputs paying this wallet
         self.address = self.F.address(self.compressed_public_key)
+        self.hex_address = self.F.hex_address(self.address)
 
         # Logging
         self.logger.debug(f'Logger instantiated in wallet with address {self.address} with name: {self.logger.name}')
@@ -220,7 +221,7 @@ class Wallet():
         outputs = [utxo_output]
         rebate = utxo_amount - (amount + fees)
         if rebate > 0:
-            utxo_rebate = UTXO_OUTPUT(amount=rebate, address=self.address)
+            utxo_rebate = UTXO_OUTPUT(amount=rebate, address=self.address, hex_address=self.hex_address)
             outputs.append(utxo_rebate)
 
         new_tx = Transaction(inputs, outputs)
@@ -0,0 +1,254 @@
+'''
+The WorkServer class
+
+A minimal local work-distribution server so hashing processes or hosts outside the Node can mine on its block template.
+Messages are newline delimited json over a tcp socket.
+
+    Request: {"method": "get_work"}
+    Response: {"job_id": <str>, "raw_prefix": <str>, "timestamp": <int>, "max_timestamp": <int>, "target": <hex str>,
+                "start_nonce": <int>, "end_nonce": <int>}
+
+    Request: {"method": "submit", "job_id": <str>, "nonce": <int>, "timestamp": <int>}
+    Response: {"accepted": <bool>, "message": <str>}
+
+The block id for a job is the sha256 of the encoded string raw_prefix + nonce + timestamp, where the nonce and timestamp
+are zero-padded hex strings of NONCE_CHARS and TIMESTAMP_CHARS characters respectively.
+'''
+import json
+import logging
+import secrets
+import socket
+import socketserver
+import threading
+import time
+from hashlib import sha256
+
+from block import Block
+from formatter import Formatter
+from miner import search_prefix, roll_extra_nonce
+from node import Node
+
+
+class WorkServer:
+    '''
+    The WorkServer hands out disjoint nonce ranges of the Node's next block template. Solved nonces are added to the Node
+    with Node.add_block, which validates the Block, and the added Block is gossiped.
+    The template uses Node.create_next_block, so the WorkServer should be used in place of the in-process miner.
+    '''
+    # Formatter
+    f = Formatter()
+
+    # Network defaults
+    DEFAULT_HOST = '127.0.0.1'
+    DEFAULT_PORT = 43000
+
+    # Nonces handed out per job - small enough that hashers ask for new work well within a heartbeat
+    NONCE_CHUNK = pow(2, 24)
+
+    # Rebuild template to pick up new transactions
+    TEMPLATE_TIMEOUT = Formatter.HEARTBEAT
+
+    # Outstanding jobs kept - the oldest job is dropped past this
+    MAX_JOBS = pow(2, 10)
+
+    def __init__(self, node: Node, host=DEFAULT_HOST, port=DEFAULT_PORT, nonce_chunk=NONCE_CHUNK, logger=None):
+        # Logging
+        if logger:
+            self.logger = logger.getChild('WorkServer')
+        else:
+            self.logger = logging.getLogger('WorkServer')
+            self.logger.setLevel('DEBUG')
+            self.logger.addHandler(logging.StreamHandler())
+
+        self.node = node
+        self.nonce_chunk = nonce_chunk
+        self.nonce_space = pow(16, self.f.NONCE_CHARS)
+
+        # Current template
+        self.template = None
+        self.max_timestamp = 0
+        self.template_time = 0
+        self.next_nonce = 0
+
+        # Outstanding jobs by job_id
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+        # Server
+        self.server = socketserver.ThreadingTCPServer((host, port), self.handler(), bind_and_activate=True)
+        self.server.daemon_threads = True
+        self.server_thread = None
+
+    @property
+    def address(self):
+        return self.server.server_address
+
+    def handler(self):
+        work_server = self
+
+        class WorkHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        request_dict = json.loads(line)
+                        response_dict = work_server.handle_request(request_dict)
+                    except (json.JSONDecodeError, TypeError, AttributeError):
+                        response_dict = {'error': 'JSON decode error'}
+                    self.wfile.write((json.dumps(response_dict) + '\n').encode())
+
+        return WorkHandler
+
+    def start(self):
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+        # Logging
+        self.logger.info(f'Work server listening on {self.address}')
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.node.release_block_transactions()
+
+    # --- REQUESTS --- #
+    def handle_request(self, request_dict: dict) -> dict:
+        method = request_dict.get('method')
+        if method == 'get_work':
+            return self.get_work()
+        elif method == 'submit':
+            try:
+                return self.submit(request_dict['job_id'], int(request_dict['nonce']), int(request_dict['timestamp']))
+            except (KeyError, ValueError):
+                return {'accepted': False, 'message': 'Submit dict error'}
+        return {'error': f'Unknown method {method}'}
+
+    # --- TEMPLATE --- #
+    def update_template(self):
+        '''
+        Build a new template if the chain tip has moved or the template has timed out
+        '''
+        tip_changed = self.template is None or self.template.prev_id != self.node.last_block.id
+        if tip_changed or time.time() - self.template_time > self.TEMPLATE_TIMEOUT:
+            # Keep only the jobs for the outgoing template, or none if the tip changed
+            old_template = self.template
+            self.jobs = {} if tip_changed else {job_id: job for (job_id, job) in self.jobs.items() if
+                                                job[0] is old_template}
+            with self.node.block_lock:
+                self.node.release_block_transactions()
+                self.template = self.node.create_next_block()
+                self.max_timestamp = self.node.last_block.timestamp + pow(self.f.HEARTBEAT, 2)
+
+                # Timestamp must be after the last block
+                if self.template.timestamp <= self.node.last_block.timestamp:
+                    self.template.header.timestamp = self.node.last_block.timestamp + 1
+            self.template_time = time.time()
+            self.next_nonce = 0
+            # Logging
+            self.logger.debug(f'New work template at height {self.template.height}')
+
+        # Roll extra nonce once the nonce space is handed out - outstanding jobs keep their template
+        if self.next_nonce >= self.nonce_space:
+            self.template = roll_extra_nonce(self.template)
+            self.next_nonce = 0
+
+    def get_work(self) -> dict:
+        with self.lock:
+            self.update_template()
+            start_nonce = self.next_nonce
+            end_nonce = min(start_nonce + self.nonce_chunk, self.nonce_space)
+            self.next_nonce = end_nonce
+
+            job_id = secrets.token_hex(8)
+            self.jobs[job_id] = (self.template, self.max_timestamp, start_nonce, end_nonce)
+            while len(self.jobs) > self.MAX_JOBS:
+                self.jobs.pop(next(iter(self.jobs)))
+
+            return {
+                'job_id': job_id,
+                'raw_prefix': self.template.header.raw_prefix,
+                'timestamp': self.template.timestamp,
+                'max_timestamp': self.max_timestamp,
+                'target': format(self.template.target, f'0{self.f.HASH_CHARS}x'),
+                'start_nonce': start_nonce,
+                'end_nonce': end_nonce
+            }
+
+    def submit(self, job_id: str, nonce: int, timestamp: int) -> dict:
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            return {'accepted': False, 'message': f'Unknown or stale job {job_id}'}
+        template, max_timestamp, start_nonce, end_nonce = job
+
+        # Check submitted values against job
+        if not start_nonce <= nonce < end_nonce:
+            return {'accepted': False, 'message': f'Nonce {nonce} outside job range'}
+        if not template.timestamp <= timestamp <= max_timestamp:
+            return {'accepted': False, 'message': f'Timestamp {timestamp} outside job range'}
+
+        # Create block from template - transactions are shared with the template, not decoded again
+        block = Block(template.prev_id, template.target, nonce, timestamp, template.mining_tx, template.transactions)
+        if int(block.id, 16) > block.target:
+            return {'accepted': False, 'message': 'Block id above target'}
+
+        # Add block - validated once by the Blockchain
+        if not self.node.add_block(block):
+            return {'accepted': False, 'message': 'Block failed validation'}
+
+        # Logging
+        self.logger.info(f'Work server accepted block at height {block.height} from job {job_id}')
+        self.node.gossip_protocol_block(block)
+        return {'accepted': True, 'message': f'Added block at height {block.height}'}
+
+
+class WorkClient:
+    '''
+    A hashing client for the WorkServer
+    '''
+    # Formatter
+    f = Formatter()
+
+    def __init__(self, host=WorkServer.DEFAULT_HOST, port=WorkServer.DEFAULT_PORT):
+        self.socket = socket.create_connection((host, port))
+        self.file = self.socket.makefile('rwb')
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+    def request(self, request_dict: dict) -> dict:
+        self.file.write((json.dumps(request_dict) + '\n').encode())
+        self.file.flush()
+        return json.loads(self.file.readline())
+
+    def get_work(self) -> dict:
+        return self.request({'method': 'get_work'})
+
+    def submit(self, job_id: str, nonce: int, timestamp: int) -> dict:
+        return self.request({'method': 'submit', 'job_id': job_id, 'nonce': nonce, 'timestamp': timestamp})
+
+    def work(self, job: dict):
+        '''
+        Search the job's nonce range at the job timestamp. Returns (nonce, timestamp) or None if the range is
+        exhausted, in which case the client asks for new work.
+        '''
+        prefix_hash = sha256(job['raw_prefix'].encode())
+        suffix = format(job['timestamp'], f'0{self.f.TIMESTAMP_CHARS}x').encode()
+        target = int(job['target'], 16)
+        nonce = search_prefix(prefix_hash, suffix, target, job['start_nonce'], job['end_nonce'])
+        if nonce is None:
+            return None
+        return nonce, job['timestamp']
+
+    def mine(self, blocks=1) -> int:
+        '''
+        Get work and submit solutions until the given number of blocks are accepted. Returns the number accepted.
+        '''
+        accepted = 0
+        while accepted < blocks:
+            job = self.get_work()
+            solution = self.work(job)
+            if solution:
+                nonce, timestamp = solution
+                if self.submit(job['job_id'], nonce, timestamp)['accepted']:
+                    accepted += 1
+        return accepted